@@ -1,13 +1,20 @@
 import sys
+from src.startup import profiler
 import qdarkstyle
 from PyQt5.QtWidgets import QApplication
 from src.gui import MainWindow
 
 
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        sys.argv.remove("--profile-startup")
+        profiler.enabled = True
+    profiler.mark("gui modules imported")
     app = QApplication(sys.argv)
     dark_stylesheet = qdarkstyle.load_stylesheet_pyqt5()
     app.setStyleSheet(dark_stylesheet)
+    profiler.mark("application created")
     gui = MainWindow()
+    profiler.mark("main window created")
     gui.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
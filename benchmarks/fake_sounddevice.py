@@ -0,0 +1,152 @@
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
+
+SPEED = 1.0
+DEFAULT_BLOCK_SIZE = 1024
+SIGNAL_FREQUENCY = 220.0
+NOISE_AMPLITUDE = 0.01
+SIGNAL_AMPLITUDE = 0.3
+
+streams = []
+devices = [
+    {"name": "Fake Microphone", "index": 0, "max_input_channels": 2, "max_output_channels": 0, "default_samplerate": 44100.0},
+    {"name": "Fake USB Microphone", "index": 1, "max_input_channels": 1, "max_output_channels": 0, "default_samplerate": 48000.0},
+    {"name": "Fake Speakers", "index": 2, "max_input_channels": 0, "max_output_channels": 2, "default_samplerate": 44100.0},
+]
+
+class CallbackStop(Exception):
+    pass
+
+class CallbackAbort(Exception):
+    pass
+
+class CallbackFlags:
+    def __init__(self, input_overflow=False, output_underflow=False):
+        self.input_overflow = input_overflow
+        self.input_underflow = False
+        self.output_overflow = False
+        self.output_underflow = output_underflow
+        self.priming_output = False
+
+    def __bool__(self):
+        return self.input_overflow or self.input_underflow or self.output_overflow or self.output_underflow
+
+def stop():
+    pass
+
+def query_devices(device=None, kind=None):
+    if device is None:
+        return list(devices)
+    if isinstance(device, int):
+        return devices[device]
+    return next(info for info in devices if device in info["name"])
+
+class _Stream:
+    def __init__(self, samplerate=None, blocksize=None, device=None, channels=1, dtype='float32',
+                 callback=None, finished_callback=None, **kwargs):
+        self.samplerate = samplerate or 44100
+        self.blocksize = blocksize or DEFAULT_BLOCK_SIZE
+        self.device = device
+        self.channels = channels
+        self.dtype = dtype
+        self.callback = callback
+        self.finished_callback = finished_callback
+        self.active = False
+        self.callback_count = 0
+        self.frames_processed = 0
+        self.late_callbacks = 0
+        self.started_at = None
+        self.first_callback_at = None
+        self._late = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        streams.append(self)
+
+    @property
+    def time(self):
+        return time.perf_counter()
+
+    def start(self):
+        self._stop_event.clear()
+        self.active = True
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    abort = stop
+
+    def close(self):
+        self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        self.close()
+
+    def _run(self):
+        period = self.blocksize / self.samplerate / SPEED
+        next_time = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                if self.first_callback_at is None:
+                    self.first_callback_at = time.perf_counter()
+                status = self._status(self._late)
+                self._late = False
+                self._process(status)
+                self.callback_count += 1
+                self.frames_processed += self.blocksize
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                else:
+                    self._late = True
+                    self.late_callbacks += 1
+        except (CallbackStop, CallbackAbort):
+            pass
+        finally:
+            self.active = False
+            if self.finished_callback:
+                self.finished_callback()
+
+    def _time_info(self):
+        now = time.perf_counter()
+        return SimpleNamespace(inputBufferAdcTime=now, outputBufferDacTime=now, currentTime=now)
+
+class InputStream(_Stream):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._phase = 0
+        self._rng = np.random.default_rng(0)
+
+    def _status(self, late):
+        return CallbackFlags(input_overflow=late)
+
+    def _process(self, status):
+        index = np.arange(self._phase, self._phase + self.blocksize)
+        self._phase += self.blocksize
+        tone = SIGNAL_AMPLITUDE * np.sin(2 * np.pi * SIGNAL_FREQUENCY * index / self.samplerate)
+        noise = self._rng.normal(0, NOISE_AMPLITUDE, (self.blocksize, self.channels))
+        indata = (tone[:, None] + noise).astype(self.dtype)
+        self.callback(indata, self.blocksize, self._time_info(), status)
+
+class OutputStream(_Stream):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._outdata = np.zeros((self.blocksize, self.channels), dtype=self.dtype)
+
+    def _status(self, late):
+        return CallbackFlags(output_underflow=late)
+
+    def _process(self, status):
+        self.callback(self._outdata, self.blocksize, self._time_info(), status)
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from . import fake_sounddevice
+
+WORK_DIR = tempfile.mkdtemp(prefix="voice-recorder-bench-")
+os.environ["VOICE_RECORDER_RECORDINGS_PATH"] = os.path.join(WORK_DIR, "recordings")
+os.environ["VOICE_RECORDER_DATABASE_URL"] = "sqlite:///" + os.path.join(WORK_DIR, "bench.sqlite")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.modules["sounddevice"] = fake_sounddevice
+
+import numpy as np
+import soundfile as sf
+from src import config, utils
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "mean": statistics.fmean(samples),
+        "median": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max": samples[-1],
+    }
+
+def write_test_file(seconds, samplerate=44100, channels=2, name=None):
+    config.ensure_recordings_dir()
+    file_path = os.path.join(config.RECORDED_FILES_PATH, name or f"bench_{seconds}s_{samplerate}_{channels}.wav")
+    if not os.path.exists(file_path):
+        block = samplerate * 10
+        with sf.SoundFile(file_path, mode='w', samplerate=samplerate, channels=channels, subtype='PCM_16') as file:
+            for start in range(0, seconds * samplerate, block):
+                frames = min(block, seconds * samplerate - start)
+                index = np.arange(start, start + frames)
+                tone = 0.3 * np.sin(2 * np.pi * 220 * index / samplerate)
+                file.write(np.repeat(tone[:, None], channels, axis=1).astype('float32'))
+    return file_path
+
+def wait_for_new_stream(known_streams, timeout=60):
+    wait_for(lambda: len(fake_sounddevice.streams) > known_streams, timeout)
+    return fake_sounddevice.streams[known_streams]
+
+def wait_for(condition, timeout, interval=0.005):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(interval)
+    return True
+
+def bench_recorder(seconds, speed, profiles):
+    from src.engine import Recorder
+    results = {}
+    fake_sounddevice.SPEED = speed
+    for profile_name in profiles:
+        profile = config.RECORDING_PROFILES[profile_name]
+        file_path = utils.get_audio_file_path(f"bench_record_{profile_name.replace(' ', '_')}_{time.time_ns()}"
+                                              + config.AUDIO_FILE_EXTENSIONS[profile["format"]])
+        recorder = Recorder(file_path, **profile)
+        thread = threading.Thread(target=recorder.run)
+        known_streams = len(fake_sounddevice.streams)
+        started_at = time.perf_counter()
+        thread.start()
+        stream = wait_for_new_stream(known_streams)
+        target_frames = seconds * profile["samplerate"]
+        wait_for(lambda: stream.frames_processed >= target_frames, timeout=seconds / speed * 5 + 10)
+        recorder.stop()
+        thread.join()
+        wall_time = time.perf_counter() - started_at
+        stats = recorder.stats
+        results[profile_name] = {
+            "audio_seconds": stream.frames_processed / profile["samplerate"],
+            "wall_seconds": wall_time,
+            "realtime_factor": stream.frames_processed / profile["samplerate"] / wall_time,
+            "callbacks": stream.callback_count,
+            "frames_captured": stream.frames_processed,
+            "frames_written": recorder.info["frames"] if recorder.info else 0,
+            "dropped_frames": stats["dropped_frames"],
+            "buffer_overflows": stats["buffer_overflows"],
+            "xruns": stats["xruns"],
+            "bytes_written": recorder.info["size_bytes"] if recorder.info else 0,
+        }
+    fake_sounddevice.SPEED = 1.0
+    return results
+
+def bench_playback_start(lengths, repeats):
+    from src.audio_cache import AudioCache
+    from src.engine import Player
+    results = {}
+    for seconds in lengths:
+        file_path = write_test_file(seconds)
+        cache = AudioCache()
+        cache.load(file_path)
+        modes = {
+            "streaming": lambda: Player(file_path, streaming=True),
+            "in_memory": lambda: Player(file_path, streaming=False),
+            "cached": lambda: Player(file_path, cache=cache),
+        }
+        results[f"{seconds}s"] = {}
+        for mode, create_player in modes.items():
+            samples = []
+            for _ in range(repeats):
+                known_streams = len(fake_sounddevice.streams)
+                started_at = time.perf_counter()
+                player = create_player()
+                thread = threading.Thread(target=player.run)
+                thread.start()
+                stream = wait_for_new_stream(known_streams)
+                wait_for(lambda: stream.first_callback_at, timeout=60)
+                samples.append((stream.first_callback_at - started_at) * 1000)
+                player.stop()
+                thread.join()
+            results[f"{seconds}s"][mode] = summarize(samples)
+    return results
+
+def _qt_application():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+def bench_waveform(lengths, repeats):
+    from src.gui import WaveformViewer
+    from src.peaks import load_peaks
+    app = _qt_application()
+    viewer = WaveformViewer()
+    viewer.resize(*config.APPLICATION_SIZE)
+    viewer.show()
+    viewer.create_canvas()
+    app.processEvents()
+    results = {}
+    for seconds in lengths:
+        file_path = write_test_file(seconds)
+        started_at = time.perf_counter()
+        pyramid = load_peaks(file_path)
+        peaks_ms = (time.perf_counter() - started_at) * 1000
+        samples = []
+        for _ in range(repeats):
+            started_at = time.perf_counter()
+            viewer.update_waveform(pyramid)
+            samples.append((time.perf_counter() - started_at) * 1000)
+            app.processEvents()
+        results[f"{seconds}s"] = {"load_peaks_ms": peaks_ms, "render_ms": summarize(samples)}
+    viewer.close()
+    return results
+
+def bench_navigation(recordings, steps):
+    from sqlalchemy.exc import SQLAlchemyError
+    from src import models
+    from src.gui import MainWindow
+    models.Base.metadata.create_all(models.get_engine())
+    session = models.Session()
+    try:
+        existing = session.query(models.RecordingFile).count()
+    except SQLAlchemyError:
+        existing = 0
+    source_path = write_test_file(1, samplerate=8000, channels=1, name="bench_navigation_source.wav")
+    for number in range(existing, recordings):
+        file_name = f"Recording_bench-{number:06d}_.wav"
+        file_path = os.path.join(config.RECORDED_FILES_PATH, file_name)
+        if not os.path.exists(file_path):
+            os.link(source_path, file_path)
+        session.add(models.RecordingFile(file_name=file_name, file_path=file_path, duration=1.0))
+    session.commit()
+    session.close()
+
+    app = _qt_application()
+    window = MainWindow()
+    window.show()
+    deadline = time.perf_counter() + 60
+    while (window._audio_processor is None or len(window.recording_index) < recordings) and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    samples = []
+    for step in range(steps):
+        started_at = time.perf_counter()
+        window.navigate_audio("prev" if step % 20 < 10 else "next")
+        samples.append((time.perf_counter() - started_at) * 1000)
+        app.processEvents()
+    window._audio_processor.stop_palying()
+    window.close()
+    app.processEvents()
+    return {"recordings": recordings, "latency_ms": summarize(samples)}
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current, previous_path):
+    with open(previous_path) as previous_file:
+        previous = json.load(previous_file)["benchmarks"]
+
+    def walk(new, old, path):
+        if isinstance(new, dict) and isinstance(old, dict):
+            for key in new:
+                if key in old:
+                    walk(new[key], old[key], path + [key])
+        elif isinstance(new, (int, float)) and isinstance(old, (int, float)) and old:
+            change = (new - old) / abs(old) * 100
+            print(f"{'.'.join(path):70s} {old:12.3f} -> {new:12.3f} ({change:+.1f}%)")
+
+    walk(current, previous, [])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the recorder, player, waveform and navigation paths.")
+    parser.add_argument("--output", default="bench_output.json", help="where to write the JSON results")
+    parser.add_argument("--compare", default=None, help="previous results file to compare against")
+    parser.add_argument("--quick", action="store_true", help="use short recordings and fewer repetitions")
+    parser.add_argument("--speed", type=float, default=20.0, help="simulated capture speed relative to real time")
+    parser.add_argument("--only", nargs="*", default=None,
+                        choices=["recorder", "playback_start", "waveform", "navigation"])
+    args = parser.parse_args(argv)
+
+    lengths = [10, 60] if args.quick else [10, 60, 600]
+    repeats = 3 if args.quick else 10
+    benchmarks = {
+        "recorder": lambda: bench_recorder(30 if args.quick else 300, args.speed, ["Studio", "Voice", "Voice FLAC"]),
+        "playback_start": lambda: bench_playback_start(lengths, repeats),
+        "waveform": lambda: bench_waveform(lengths, repeats),
+        "navigation": lambda: bench_navigation(200 if args.quick else 2000, 50 if args.quick else 200),
+    }
+    results = {}
+    for name, run in benchmarks.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"Running {name}...", file=sys.stderr)
+        try:
+            results[name] = run()
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "speed": args.speed,
+        },
+        "benchmarks": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+import argparse
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy.exc import SQLAlchemyError
+from . import config
+from .reader import open_reader
+
+class AnalysisCancelled(Exception):
+    pass
+
+def _biquad_response(b, a, length):
+    output = np.zeros(length)
+    x1 = x2 = y1 = y2 = 0.0
+    for n in range(length):
+        x = 1.0 if n == 0 else 0.0
+        y = b[0] * x + b[1] * x1 + b[2] * x2 - a[1] * y1 - a[2] * y2
+        x2, x1, y2, y1 = x1, x, y1, y
+        output[n] = y
+    return output
+
+# BS.1770 K-weighting (high shelf followed by a high-pass), applied as its truncated impulse response
+# so whole blocks can be filtered with one FFT convolution instead of a per-sample recursion.
+def k_weighting_response(samplerate, seconds=config.ANALYSIS_K_WEIGHTING_SECONDS):
+    length = max(16, int(samplerate * seconds))
+    k = math.tan(math.pi * 1681.974450955533 / samplerate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = _biquad_response([(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0],
+                             [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0], length)
+    k = math.tan(math.pi * 38.13547087602444 / samplerate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    highpass = _biquad_response([1.0, -2.0, 1.0], [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0], length)
+    return np.convolve(shelf, highpass)[:length]
+
+class LoudnessMeter:
+    def __init__(self, samplerate, channels, block_size=config.ANALYSIS_BLOCK_SIZE):
+        self.response = k_weighting_response(samplerate)
+        self.fft_size = 1 << (block_size + len(self.response) - 1).bit_length()
+        self.response_spectrum = np.fft.rfft(self.response, self.fft_size)[:, None]
+        self.sub_block = max(1, int(samplerate * config.ANALYSIS_SUB_BLOCK_SECONDS))
+        self.frames = 0
+        self.peak = 0.0
+        self.clipped_samples = 0
+        self.weighted_energy = []
+        self.energy = []
+        self._tail = np.zeros((len(self.response) - 1, channels))
+        self._pending_weighted = np.zeros((0, channels))
+        self._pending = np.zeros((0, channels))
+
+    def add(self, data):
+        self.frames += len(data)
+        if not len(data):
+            return
+        magnitude = np.abs(data)
+        self.peak = max(self.peak, float(magnitude.max()))
+        self.clipped_samples += int(np.count_nonzero(magnitude >= config.LEVEL_CLIP_THRESHOLD))
+        filtered = np.fft.irfft(np.fft.rfft(data, self.fft_size, axis=0) * self.response_spectrum, self.fft_size, axis=0)
+        filtered = filtered[:len(data) + len(self._tail)]
+        filtered[:len(self._tail)] += self._tail
+        self._tail = filtered[len(data):].copy()
+        self._pending_weighted = self._accumulate(self._pending_weighted, filtered[:len(data)], self.weighted_energy)
+        self._pending = self._accumulate(self._pending, data, self.energy)
+
+    def _accumulate(self, pending, data, energies):
+        if len(pending):
+            data = np.concatenate([pending, data])
+        full = len(data) // self.sub_block * self.sub_block
+        if full:
+            blocks = data[:full].reshape(-1, self.sub_block, data.shape[1])
+            energies.append(np.square(blocks).mean(axis=1).sum(axis=1))
+        return data[full:].copy()
+
+    def result(self):
+        weighted = np.concatenate(self.weighted_energy) if self.weighted_energy else np.zeros(0)
+        energy = np.concatenate(self.energy) if self.energy else np.zeros(0)
+        channels = self._pending.shape[1]
+        silence_level = channels * 10 ** (config.ANALYSIS_SILENCE_DB / 10)
+        return {
+            "loudness": integrated_loudness(weighted),
+            "peak_level": self.peak,
+            "clipped_samples": self.clipped_samples,
+            "silence_ratio": float(np.mean(energy < silence_level)) if len(energy) else 1.0,
+        }
+
+def integrated_loudness(energies):
+    if len(energies) >= 4:
+        blocks = (energies[:-3] + energies[1:-2] + energies[2:-1] + energies[3:]) / 4
+    else:
+        blocks = energies[:1] if len(energies) else energies
+    with np.errstate(divide='ignore'):
+        loudness = -0.691 + 10 * np.log10(blocks)
+    blocks = blocks[loudness > -70]
+    loudness = loudness[loudness > -70]
+    if not len(blocks):
+        return None
+    relative_gate = -0.691 + 10 * np.log10(blocks.mean()) - 10
+    return float(-0.691 + 10 * np.log10(blocks[loudness > relative_gate].mean()))
+
+def analyze_file(file_path, should_pause=None, should_stop=None):
+    with open_reader(file_path) as reader:
+        meter = LoudnessMeter(reader.samplerate, reader.channels)
+        for start in range(0, reader.frames, config.ANALYSIS_BLOCK_SIZE):
+            while should_pause and should_pause():
+                if should_stop and should_stop():
+                    raise AnalysisCancelled(file_path)
+                time.sleep(config.ANALYSIS_PAUSE_POLL_SECONDS)
+            if should_stop and should_stop():
+                raise AnalysisCancelled(file_path)
+            meter.add(reader.read(start, config.ANALYSIS_BLOCK_SIZE).astype('float64'))
+            time.sleep(config.ANALYSIS_BLOCK_SLEEP_SECONDS)
+    return meter.result()
+
+_pause_event = None
+_stop_event = None
+
+def _init_worker(pause_event, stop_event):
+    global _pause_event, _stop_event
+    _pause_event, _stop_event = pause_event, stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(os, "nice"):
+        os.nice(config.ANALYSIS_NICENESS)
+
+def _analyze_job(file_path):
+    return analyze_file(file_path, _pause_event.is_set, _stop_event.is_set)
+
+def enqueue_missing(session):
+    from sqlalchemy import insert, literal, select
+    from .models import AnalysisJob, RecordingFile
+    queued = select(AnalysisJob.recording_id)
+    rows = select(RecordingFile.id, literal("pending"), literal(0), literal(datetime.now())).where(
+        RecordingFile.missing.isnot(True), RecordingFile.duration.isnot(None), RecordingFile.id.notin_(queued))
+    result = session.execute(insert(AnalysisJob).from_select(["recording_id", "status", "attempts", "queued_at"], rows))
+    session.commit()
+    return result.rowcount
+
+def claim_jobs(session, limit):
+    from .models import AnalysisJob, RecordingFile
+    rows = (session.query(AnalysisJob.id, AnalysisJob.recording_id, RecordingFile.file_path)
+            .join(RecordingFile, RecordingFile.id == AnalysisJob.recording_id)
+            .filter(AnalysisJob.status == "pending").order_by(AnalysisJob.id).limit(limit).all())
+    claimed = []
+    for job_id, recording_id, file_path in rows:
+        if session.query(AnalysisJob).filter(AnalysisJob.id == job_id, AnalysisJob.status == "pending").update(
+                {"status": "running", "updated_at": datetime.now(), "owner_host": socket.gethostname(),
+                 "owner_pid": os.getpid()}, synchronize_session=False):
+            claimed.append((job_id, recording_id, file_path))
+    session.commit()
+    return claimed
+
+def release_stale_jobs(session, max_age=config.ANALYSIS_STALE_SECONDS):
+    from sqlalchemy import or_
+    from .models import AnalysisJob
+    cutoff = datetime.now() - timedelta(seconds=max_age)
+    session.query(AnalysisJob).filter(AnalysisJob.status == "running", or_(
+        AnalysisJob.updated_at < cutoff, AnalysisJob.updated_at.is_(None))).update(
+        {"status": "pending"}, synchronize_session=False)
+    session.commit()
+
+def _process_alive(pid):
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x00100000, False, pid)  # SYNCHRONIZE
+        if not handle:
+            return kernel32.GetLastError() == 5  # ERROR_ACCESS_DENIED
+        try:
+            return kernel32.WaitForSingleObject(handle, 0) == 0x102  # WAIT_TIMEOUT
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def release_dead_claims(session):
+    from .models import AnalysisJob
+    rows = session.query(AnalysisJob.owner_pid).filter(
+        AnalysisJob.status == "running", AnalysisJob.owner_host == socket.gethostname()).distinct().all()
+    dead = [pid for pid, in rows if pid is not None and pid != os.getpid() and not _process_alive(pid)]
+    if dead:
+        session.query(AnalysisJob).filter(AnalysisJob.status == "running", AnalysisJob.owner_host == socket.gethostname(),
+                                          AnalysisJob.owner_pid.in_(dead)).update(
+            {"status": "pending"}, synchronize_session=False)
+    session.commit()
+
+class AnalysisService(threading.Thread):
+    def __init__(self, is_busy=None, workers=config.ANALYSIS_WORKERS, until_idle=False, on_analyzed=None):
+        super().__init__(daemon=True)
+        self.is_busy = is_busy
+        self.workers = workers
+        self.until_idle = until_idle
+        self.on_analyzed = on_analyzed
+        self.analyzed = 0
+        self.failed = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._pause_event = self._context.Event()
+        self._stop_event = self._context.Event()
+        self._wake_event = threading.Event()
+        self._claimed = set()
+
+    def run(self):
+        from .models import Session
+        session = Session()
+        try:
+            try:
+                release_dead_claims(session)
+            except SQLAlchemyError:
+                session.rollback()
+            finished = False
+            while not finished and not self._stop_event.is_set():
+                with ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context, initializer=_init_worker,
+                                         initargs=(self._pause_event, self._stop_event)) as pool:
+                    finished = self._serve(session, pool)
+        finally:
+            self._release(session, self._claimed)
+            session.close()
+
+    def _serve(self, session, pool):
+        running = {}
+        next_poll = 0.0
+        next_heartbeat = time.monotonic() + config.ANALYSIS_HEARTBEAT_SECONDS
+        delay = config.PERSISTENCE_RETRY_DELAY
+        while not self._stop_event.is_set():
+            paused = bool(self.is_busy and self.is_busy())
+            if paused != self._pause_event.is_set():
+                (self._pause_event.set if paused else self._pause_event.clear)()
+            try:
+                if not running and time.monotonic() >= next_poll:
+                    release_stale_jobs(session)
+                    enqueue_missing(session)
+                    next_poll = time.monotonic() + config.ANALYSIS_POLL_SECONDS
+                if self._claimed and time.monotonic() >= next_heartbeat:
+                    self._heartbeat(session)
+                    next_heartbeat = time.monotonic() + config.ANALYSIS_HEARTBEAT_SECONDS
+                if not paused and len(running) < self.workers:
+                    for job in claim_jobs(session, self.workers - len(running)):
+                        self._claimed.add(job[0])
+                        running[pool.submit(_analyze_job, job[2])] = job
+                if not running and self.until_idle:
+                    return True
+                if running:
+                    done, _ = wait(running, timeout=config.ANALYSIS_PAUSE_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._store(session, running.pop(future), future)
+                elif self._wake_event.wait(config.ANALYSIS_PAUSE_POLL_SECONDS * 4):
+                    self._wake_event.clear()
+                    next_poll = min(next_poll, time.monotonic())
+                delay = config.PERSISTENCE_RETRY_DELAY
+            except BrokenProcessPool:
+                for future, job in running.items():
+                    self._store(session, job, future)
+                self._release(session, self._claimed)
+                return False
+            except SQLAlchemyError:
+                session.rollback()
+                if self._wake_event.wait(delay):
+                    self._wake_event.clear()
+                delay = min(delay * 2, config.PERSISTENCE_MAX_RETRY_DELAY)
+        for future in running:
+            future.cancel()
+        return True
+
+    def _heartbeat(self, session):
+        from .models import AnalysisJob
+        session.query(AnalysisJob).filter(AnalysisJob.id.in_(self._claimed), AnalysisJob.status == "running").update(
+            {"updated_at": datetime.now()}, synchronize_session=False)
+        session.commit()
+
+    def _release(self, session, job_ids):
+        from .models import AnalysisJob
+        if not job_ids:
+            return
+        try:
+            session.query(AnalysisJob).filter(AnalysisJob.id.in_(job_ids), AnalysisJob.status == "running").update(
+                {"status": "pending"}, synchronize_session=False)
+            session.commit()
+            job_ids.clear()
+        except SQLAlchemyError:
+            session.rollback()
+
+    def _store(self, session, job, future):
+        from .models import AnalysisJob, RecordingAnalysis
+        job_id, recording_id, file_path = job
+        record = session.get(AnalysisJob, job_id)
+        try:
+            result = future.result()
+        except AnalysisCancelled:
+            record.status = "pending"
+        except (OSError, RuntimeError, ValueError) as e:
+            record.attempts = (record.attempts or 0) + 1
+            record.error = str(e)
+            record.status = "failed" if record.attempts >= config.ANALYSIS_MAX_ATTEMPTS else "pending"
+            self.failed += record.status == "failed"
+        else:
+            session.query(RecordingAnalysis).filter_by(recording_id=recording_id).delete(synchronize_session=False)
+            session.add(RecordingAnalysis(recording_id=recording_id, analyzed_at=datetime.now(), **result))
+            record.status = "done"
+            record.error = None
+            self.analyzed += 1
+            if self.on_analyzed:
+                self.on_analyzed(file_path, result)
+        record.updated_at = datetime.now()
+        session.commit()
+        self._claimed.discard(job_id)
+
+    def wake(self):
+        self._wake_event.set()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self._wake_event.set()
+        self.join(timeout)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze loudness, peaks, clipping and silence of all recordings.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+    service = AnalysisService(workers=args.workers, until_idle=True,
+                              on_analyzed=lambda file_path, result: print(f"Analyzed {os.path.basename(file_path)}"))
+    service.start()
+    try:
+        while service.is_alive():
+            service.join(0.5)
+    except KeyboardInterrupt:
+        service.stop()
+    print(f"Analyzed {service.analyzed} recordings, {service.failed} failed")
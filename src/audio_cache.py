@@ -0,0 +1,80 @@
+import os
+import queue
+import threading
+from collections import OrderedDict
+from . import config
+from .peaks import load_peaks
+from .reader import open_reader
+from .utils import get_part_paths
+
+class AudioCache:
+    def __init__(self, max_bytes=config.AUDIO_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, file_path):
+        return file_path, max(os.stat(path).st_mtime_ns for path in get_part_paths(file_path))
+
+    def get(self, file_path):
+        try:
+            key = self._key(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                self._entries.move_to_end(key)
+            return item
+
+    def load(self, file_path):
+        item = self.get(file_path)
+        if item is not None:
+            return item
+        key = self._key(file_path)
+        with open_reader(file_path) as reader:
+            if reader.frames * reader.channels * 4 > self.max_bytes:
+                return None
+            data, samplerate = reader.read(0, reader.frames), reader.samplerate
+        self.put(key, data, samplerate)
+        return data, samplerate
+
+    def put(self, key, data, samplerate):
+        with self._lock:
+            for stale_key in [item for item in self._entries if item[0] == key[0] and item != key]:
+                self._discard(stale_key)
+            if key in self._entries:
+                return
+            self._entries[key] = (data, samplerate)
+            self.size_bytes += data.nbytes
+            while self.size_bytes > self.max_bytes and len(self._entries) > 1:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        data, _ = self._entries.pop(key)
+        self.size_bytes -= data.nbytes
+
+class AudioPrefetcher(threading.Thread):
+    def __init__(self, cache):
+        super().__init__(daemon=True)
+        self.cache = cache
+        self._queue = queue.Queue()
+
+    def prefetch(self, file_paths):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        for file_path in file_paths:
+            self._queue.put(file_path)
+
+    def run(self):
+        while True:
+            file_path = self._queue.get()
+            try:
+                self.cache.load(file_path)
+                load_peaks(file_path)
+            except (OSError, RuntimeError, ValueError):
+                pass
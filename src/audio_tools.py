@@ -1,84 +1,161 @@
-import sounddevice as sd
-import soundfile as sf
-import time
+import os
 from PyQt5 import QtCore
-from pynput import keyboard
-import queue
+from . import config
+from .audio_cache import AudioCache, AudioPrefetcher
+from .engine import Player, Recorder, RecordingSession, input_devices
+from .metrics import registry
+from .peaks import build_peaks, read_peaks
+
+peaks_load_seconds = registry.histogram("waveform_peaks_load_seconds", "Time spent loading or building waveform peaks")
 
 class RecorderThread(QtCore.QThread):
     recording_signal = QtCore.pyqtSignal(float)
-    def __init__(self, file_path, samplerate=44100, channels=2):
+    levels_signal = QtCore.pyqtSignal(object)
+    segment_signal = QtCore.pyqtSignal(str, float, object)
+    def __init__(self, file_path, devices=None, **recorder_options):
         super().__init__()
-        self.is_running = False
         self.file_path = file_path
-        self.samplerate  = samplerate
-        self.channels = channels
+        callbacks = {"on_levels": self.levels_signal.emit, "on_segment": self.segment_signal.emit}
+        if devices and len(devices) > 1:
+            self.recorder = RecordingSession(file_path, devices, **callbacks, **recorder_options)
+        else:
+            self.recorder = Recorder(file_path, device=devices[0] if devices else None, **callbacks, **recorder_options)
 
     def run(self):
-        self.is_running = True
-        q = queue.Queue()
-        def callback(indata, frames, time, status):
-            q.put(indata.copy())
+        self.recorder.run()
+
+    def recordings(self):
+        return self.recorder.recordings()
+
+    def results(self):
+        return self.recorder.results()
+
+    @property
+    def errors(self):
+        return getattr(self.recorder, "errors", {})
+
+    @property
+    def segments(self):
+        return self.recorder.segments
 
-        with sf.SoundFile(self.file_path, mode='x', samplerate=self.samplerate, channels=self.channels) as file:
-            with sd.InputStream(samplerate=self.samplerate, channels=self.channels, callback=callback):
-                while self.is_running:
-                    file.write(q.get())
+    @property
+    def parts(self):
+        return self.recorder.parts
+
+    @property
+    def stats(self):
+        return self.recorder.stats
 
     def stop(self):
-        self.is_running = False
-        sd.stop()
+        self.recorder.stop()
         self.wait()
 
 class AudioPlayerThread(QtCore.QThread):
     play_signal = QtCore.pyqtSignal(float, float)
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, **player_options):
         super().__init__()
         self.file_path = file_path
-        self.is_playing = False
-        self.load_audio()
-    
-    def load_audio(self):
-        self.audio_data, self.sample_rate = sf.read(self.file_path)
+        self.player = Player(file_path, on_progress=self.play_signal.emit, **player_options)
 
     def run(self):
-        start_time = time.time()
-        if not self.is_playing:
-            self.is_playing = True
-            buffer_size = 2048 
-            sd.play(self.audio_data, samplerate=self.sample_rate, blocksize=buffer_size)
-            info = sf.info(self.file_path)
-            duration = info.duration
-            while self.is_playing:
-                elapsed_time = time.time() - start_time
-                self.play_signal.emit(elapsed_time, duration)
-                if elapsed_time >= len(self.audio_data) / self.sample_rate:
-                    self.stop()
-                    break
-            self.play_signal.emit(duration, duration)
-            self.is_playing = False
+        self.player.run()
+
+    def pause(self):
+        self.player.pause()
+
+    def resume(self):
+        self.player.resume()
 
     def stop(self):
-        self.is_playing = False
-        sd.stop()
+        self.player.stop()
+
+class PeaksThread(QtCore.QThread):
+    peaks_signal = QtCore.pyqtSignal(str, object)
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            with peaks_load_seconds.time():
+                peaks = build_peaks(self.file_path)
+        except (OSError, RuntimeError, ValueError):
+            peaks = None
+        self.peaks_signal.emit(self.file_path, peaks)
+
+class ExportThread(QtCore.QThread):
+    progress_signal = QtCore.pyqtSignal(int, int, float, float, object)
+
+    def __init__(self, destination, since=None, until=None, preset=config.DEFAULT_EXPORT_PRESET, **export_options):
+        super().__init__()
+        self.destination = destination
+        self.since = since
+        self.until = until
+        self.preset = preset
+        self.export_options = export_options
+        self.exporter = None
+        self.jobs = []
+        self.results = []
+        self.error = None
+        self._cancelled = False
+
+    def run(self):
+        from sqlalchemy.exc import SQLAlchemyError
+        from .export import BulkExporter, plan_exports, select_recordings
+        from .models import Session
+        try:
+            session = Session()
+            try:
+                recordings = select_recordings(session, self.since, self.until)
+            finally:
+                session.close()
+            os.makedirs(self.destination, exist_ok=True)
+        except (SQLAlchemyError, OSError) as e:
+            self.error = e
+            return
+        self.jobs = plan_exports(recordings, self.destination, self.preset)
+        self.exporter = BulkExporter(self.jobs, self.preset, **self.export_options)
+        if self._cancelled:
+            return
+        self.results = self.exporter.run(self.progress_signal.emit)
+
+    @property
+    def is_cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        self._cancelled = True
+        if self.exporter:
+            self.exporter.cancel()
 
 class AudioProcessor(QtCore.QObject):
     recording_finished = QtCore.pyqtSignal()
+    recording_levels = QtCore.pyqtSignal(object)
+    recording_segment = QtCore.pyqtSignal(str, float, object)
     playing_finished = QtCore.pyqtSignal()
+    peaks_ready = QtCore.pyqtSignal(str, object)
 
     def __init__(self, on_playing_handler):
         super().__init__()
         self.on_playing_handler = on_playing_handler
         self.is_recording = False
         self.is_playing = False
+        self.is_paused = False
         self.recording_thread = None
         self.playing_thread = None
+        self.peaks_threads = {}
+        self.audio_cache = AudioCache()
+        self.prefetcher = AudioPrefetcher(self.audio_cache)
+        self.prefetcher.start()
 
-    def start_recording(self, file_path):
+    def start_recording(self, file_path, profile_name=config.DEFAULT_RECORDING_PROFILE, vad=None, devices=None):
         if not self.recording_thread or not self.recording_thread.isRunning():
-            self.recording_thread = RecorderThread(file_path)
+            self.recording_thread = RecorderThread(file_path, devices, vad=vad, **config.RECORDING_PROFILES[profile_name])
             self.recording_thread.finished.connect(self.recording_finished.emit)
+            self.recording_thread.levels_signal.connect(self.recording_levels.emit)
+            self.recording_thread.segment_signal.connect(self.recording_segment.emit)
             self.recording_thread.start()
             self.is_recording = True
 
@@ -87,55 +164,62 @@ class AudioProcessor(QtCore.QObject):
             self.is_recording = False
             self.recording_thread.stop()
 
-    def start_playing(self, file_path):
+    def start_playing(self, file_path, start=0.0, paused=False):
         if not self.playing_thread or not self.playing_thread.isRunning():
-            self.playing_thread = AudioPlayerThread(file_path)
-            self.playing_thread.finished.connect(self.playing_finished.emit)
+            self.playing_thread = AudioPlayerThread(file_path, cache=self.audio_cache, start=start, paused=paused)
+            self.playing_thread.finished.connect(self._on_playing_thread_finished)
             self.playing_thread.play_signal.connect(self.on_playing)
             self.playing_thread.start()
             self.is_playing = True
+            self.is_paused = paused
 
     def stop_palying(self):
         if self.playing_thread:
             self.is_playing = False
+            self.is_paused = False
             self.playing_thread.stop()
+            self.playing_thread.wait()
+
+    def _on_playing_thread_finished(self):
+        if self.sender() is self.playing_thread:
+            self.playing_finished.emit()
+
+    def seek(self, seconds):
+        if self.playing_thread and self.is_playing:
+            is_paused = self.is_paused
+            file_path = self.playing_thread.file_path
+            self.stop_palying()
+            self.start_playing(file_path, seconds, paused=is_paused)
+
+    def pause_playing(self):
+        if self.playing_thread and self.is_playing:
+            self.is_paused = True
+            self.playing_thread.pause()
+
+    def resume_playing(self):
+        if self.playing_thread and self.is_playing:
+            self.is_paused = False
+            self.playing_thread.resume()
+
+    def input_devices(self):
+        return input_devices()
+
+    def load_peaks(self, file_path):
+        with peaks_load_seconds.time():
+            peaks = read_peaks(file_path)
+        if peaks is None and file_path not in self.peaks_threads:
+            thread = PeaksThread(file_path)
+            thread.peaks_signal.connect(self._on_peaks_built)
+            self.peaks_threads[file_path] = thread
+            thread.start()
+        return peaks
+
+    def _on_peaks_built(self, file_path, peaks):
+        self.peaks_threads.pop(file_path).wait()
+        self.peaks_ready.emit(file_path, peaks)
+
+    def prefetch(self, file_paths):
+        self.prefetcher.prefetch(file_paths)
 
     def on_playing(self, elapsed_time, duration):
         self.on_playing_handler(elapsed_time, duration)
-
-class KeyInputThread(QtCore.QThread):
-    key_press_signal = QtCore.pyqtSignal(keyboard.Key)
-    def __init__(self):
-        super().__init__()
-        self.is_running = False
-
-    def run(self):
-        self.is_running = True
-        def on_press(key):
-            if key == keyboard.Key.page_up or key == keyboard.Key.page_down:
-                self.key_press_signal.emit(key)
-                
-        with keyboard.Listener(on_press=on_press) as listener:
-            while self.is_running:
-                pass
-
-    def stop(self):
-        self.is_running = False
-        self.stop()
-        self.wait()
-
-class KeyInputController(QtCore.QObject):
-    def __init__(self, key_press_handler):
-        super().__init__()
-        self.key_press_handler = key_press_handler
-        self.key_input_thread = KeyInputThread()
-        self.key_input_thread.key_press_signal.connect(self.on_key_press)
-
-    def start(self):
-        self.key_input_thread.start()
-    
-    def on_key_press(self, key):
-        self.key_press_handler(key)
-    
-    def stop(self):
-        self.key_input_thread.stop()
\ No newline at end of file
@@ -0,0 +1,47 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from . import config
+from .metadata import probe_audio_file
+from .models import RecordingFile, Session
+
+def _probe(file_path):
+    try:
+        return probe_audio_file(file_path)
+    except (OSError, RuntimeError):
+        return None
+
+def backfill(workers=None, batch_size=config.BACKFILL_BATCH_SIZE):
+    session = Session()
+    rows = [(row.id, row.file_path) for row in session.query(RecordingFile.id, RecordingFile.file_path)
+            .filter(RecordingFile.duration.is_(None)).order_by(RecordingFile.id)]
+    rows = [(row_id, file_path) for row_id, file_path in rows if file_path and os.path.exists(file_path)]
+    updated = 0
+    pending = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for (row_id, file_path), info in zip(rows, pool.map(_probe, [file_path for _, file_path in rows], chunksize=8)):
+            if info is None:
+                print(f"Skipping unreadable file {file_path}")
+                continue
+            pending.append({"id": row_id, **info})
+            if len(pending) >= batch_size:
+                updated += _commit(session, pending)
+        updated += _commit(session, pending)
+    session.close()
+    return updated
+
+def _commit(session, pending):
+    count = len(pending)
+    if count:
+        session.bulk_update_mappings(RecordingFile, pending)
+        session.commit()
+        pending.clear()
+        print(f"Updated {count} recordings")
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill audio metadata for recordings that do not have it yet.")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+    total = backfill(args.workers)
+    print(f"Backfilled {total} recordings")
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+class RingBuffer:
+    def __init__(self, capacity, channels, dtype='float32'):
+        self.capacity = capacity
+        self.channels = channels
+        self._data = np.zeros((capacity, channels), dtype=dtype)
+        self._write_index = 0
+        self._read_index = 0
+        self.overflows = 0
+        self.dropped_frames = 0
+
+    @property
+    def available(self):
+        return self._write_index - self._read_index
+
+    def write(self, data):
+        frames = len(data)
+        free = self.capacity - (self._write_index - self._read_index)
+        if frames > free:
+            self.overflows += 1
+            self.dropped_frames += frames - free
+            frames = free
+        start = self._write_index % self.capacity
+        first = min(frames, self.capacity - start)
+        self._data[start:start + first] = data[:first]
+        if frames > first:
+            self._data[:frames - first] = data[first:frames]
+        self._write_index += frames
+        return frames
+
+    def peek(self, max_frames=None):
+        frames = self._write_index - self._read_index
+        if max_frames is not None:
+            frames = min(frames, max_frames)
+        start = self._read_index % self.capacity
+        first = min(frames, self.capacity - start)
+        segments = [self._data[start:start + first]] if first else []
+        if frames > first:
+            segments.append(self._data[:frames - first])
+        return segments
+
+    def advance(self, frames):
+        self._read_index += frames
@@ -0,0 +1,243 @@
+import argparse
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from . import config, utils
+
+def _find_recording(session, reference):
+    from .models import RecordingFile
+    if reference.isdigit():
+        return session.get(RecordingFile, int(reference))
+    return session.query(RecordingFile).filter(
+        (RecordingFile.file_path == os.path.abspath(reference)) | (RecordingFile.file_name == reference)).first()
+
+def _resolve_path(reference):
+    if os.path.exists(reference):
+        return reference
+    from .models import Session
+    session = Session()
+    try:
+        recording = _find_recording(session, reference)
+    finally:
+        session.close()
+    if recording is None:
+        raise SystemExit(f"Recording {reference} not found")
+    return recording.file_path
+
+def record(args):
+    from .engine import Recorder, RecordingSession
+    from .persistence import PersistenceWorker
+    file_name = utils.create_new_audio_file_name(args.profile)
+    file_path = utils.get_audio_file_path(file_name)
+    started_at = datetime.now()
+    persistence = PersistenceWorker()
+
+    def on_segment(segment_path, start_offset, info):
+        persistence.insert(file_name=os.path.basename(segment_path), file_path=segment_path, profile=args.profile,
+                           created_at=started_at + timedelta(seconds=start_offset), **info)
+        print(f"Segment {segment_path} at {start_offset:.2f}s, {info['duration']:.2f} seconds")
+
+    options = dict(config.RECORDING_PROFILES[args.profile], vad=args.vad, on_segment=on_segment)
+    devices = [int(device) if device.isdigit() else device for device in args.device]
+    if len(devices) > 1:
+        recorder = RecordingSession(file_path, devices, **options)
+    else:
+        recorder = Recorder(file_path, device=devices[0] if devices else None, **options)
+    persistence.start()
+    thread = threading.Thread(target=recorder.run)
+    thread.start()
+    for recording_path, fields in recorder.recordings():
+        persistence.insert(file_name=os.path.basename(recording_path), file_path=recording_path, profile=args.profile,
+                           created_at=started_at, **fields)
+        print(f"Recording to {recording_path} ({args.profile})")
+    print("Press Ctrl+C to stop")
+    try:
+        thread.join(args.duration)
+    except KeyboardInterrupt:
+        pass
+    recorder.stop()
+    thread.join()
+    for recording_path, info in recorder.results():
+        persistence.update(recording_path, **info)
+        print(f"Recorded {os.path.basename(recording_path)}: {info['duration']:.2f} seconds, {info['size_bytes']} bytes")
+    for recording_path, parts in recorder.parts.items():
+        persistence.insert_segments(recording_path, parts)
+        print(f"{os.path.basename(recording_path)} was split into {len(parts)} parts")
+    for device_name, error in getattr(recorder, "errors", {}).items():
+        print(f"{device_name} failed: {error}")
+    stats = recorder.stats
+    if stats["xruns"] or stats["dropped_frames"]:
+        print(f"{stats['xruns']} xruns, {stats['dropped_frames']} dropped frames")
+    persistence.stop()
+
+def play(args):
+    from .engine import Player
+    def on_progress(elapsed_time, duration):
+        print(f"\r{elapsed_time:7.2f} / {duration:.2f} seconds", end="", flush=True)
+    player = Player(_resolve_path(args.recording), on_progress=on_progress)
+    thread = threading.Thread(target=player.run)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        player.stop()
+        thread.join()
+    print()
+
+def list_recordings(args):
+    from .models import RecordingFile, Session
+    session = Session()
+    query = session.query(RecordingFile.id, RecordingFile.created_at, RecordingFile.duration,
+                          RecordingFile.file_name, RecordingFile.missing)
+    if args.before is not None:
+        query = query.filter(RecordingFile.id < args.before)
+    for row in query.order_by(RecordingFile.id.desc()).limit(args.limit):
+        duration = f"{row.duration:9.2f}s" if row.duration is not None else " " * 10
+        created_at = row.created_at.strftime("%Y-%m-%d %H:%M:%S") if row.created_at else " " * 19
+        flag = " (missing)" if row.missing else ""
+        print(f"{row.id:6d}  {created_at}  {duration}  {row.file_name}{flag}")
+    session.close()
+
+def export(args):
+    from .export import export_file
+    size = export_file(_resolve_path(args.recording), args.destination, args.format, args.subtype)
+    print(f"Exported {args.destination} ({size} bytes)")
+
+def bulk_export(args):
+    from .export import BulkExporter, plan_exports, select_recordings
+    from .models import Session
+    if args.day:
+        args.since, args.until = args.day, args.day + timedelta(days=1)
+    session = Session()
+    try:
+        recordings = select_recordings(session, args.since, args.until)
+    finally:
+        session.close()
+    os.makedirs(args.destination, exist_ok=True)
+    jobs = plan_exports(recordings, args.destination, args.format)
+    if not jobs:
+        print("No recordings to export")
+        return
+    exporter = BulkExporter(jobs, args.format, args.samplerate, args.channels, args.workers)
+    failed = []
+
+    def on_progress(completed, count, done_seconds, total_seconds, result):
+        if result.error and result.error != "cancelled":
+            failed.append(result)
+        percent = done_seconds / total_seconds * 100 if total_seconds else completed / count * 100
+        print(f"\r[{completed:{len(str(count))}d}/{count}] {percent:5.1f}%  {os.path.basename(result.destination_path)}",
+              end="", flush=True)
+
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(exporter.run(on_progress)))
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        exporter.cancel()
+        thread.join()
+    print()
+    for result in failed:
+        print(f"Failed {result.source_path}: {result.error}")
+    exported = [result for result in results if result.error is None]
+    print(f"Exported {len(exported)} of {len(jobs)} recordings ({sum(result.size_bytes for result in exported)} bytes)"
+          + (" (cancelled)" if exporter.is_cancelled else ""))
+
+def stats(args):
+    from sqlalchemy import func
+    from .models import RecordingAnalysis, RecordingFile, Session
+    session = Session()
+    count, duration, size, missing = session.query(
+        func.count(RecordingFile.id),
+        func.sum(RecordingFile.duration),
+        func.sum(RecordingFile.size_bytes),
+        func.count(RecordingFile.id).filter(RecordingFile.missing.is_(True)),
+    ).one()
+    print(f"Recordings:     {count}")
+    print(f"Missing files:  {missing}")
+    print(f"Total duration: {(duration or 0) / 3600:.2f} hours")
+    print(f"Total size:     {(size or 0) / 1024 ** 2:.1f} MiB")
+    analyzed, clipped, silent = session.query(
+        func.count(RecordingAnalysis.id),
+        func.count(RecordingAnalysis.id).filter(RecordingAnalysis.clipped_samples > 0),
+        func.count(RecordingAnalysis.id).filter(RecordingAnalysis.silence_ratio >= 0.99),
+    ).one()
+    print(f"Analyzed:       {analyzed} ({clipped} clipped, {silent} silent)")
+    for profile, profile_count in session.query(RecordingFile.profile, func.count(RecordingFile.id)).group_by(RecordingFile.profile):
+        print(f"  {profile or 'unknown'}: {profile_count}")
+    session.close()
+
+def list_devices(args):
+    import sounddevice as sd
+    for index, device in enumerate(sd.query_devices()):
+        if device["max_input_channels"] > 0:
+            print(f"{index:3d}  {device['name']} ({device['max_input_channels']} ch, {device['default_samplerate']:.0f} Hz)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="voice-recorder", description="Record, play and manage recordings without the GUI.")
+    parser.add_argument("--metrics", default=config.METRICS_EXPORT_PATH,
+                        help="write runtime metrics to this file (.json for JSON, Prometheus text otherwise)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record from the default input device")
+    record_parser.add_argument("--profile", choices=config.RECORDING_PROFILES, default=config.DEFAULT_RECORDING_PROFILE)
+    record_parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    record_parser.add_argument("--device", action="append", default=[],
+                               help="input device name or index; repeat to record several devices at once")
+    record_parser.add_argument("--vad", choices=("trim", "split"), default=None,
+                               help="drop long silences, or write one recording per utterance")
+    record_parser.set_defaults(handler=record)
+
+    play_parser = commands.add_parser("play", help="play a recording by id, name or path")
+    play_parser.add_argument("recording")
+    play_parser.set_defaults(handler=play)
+
+    list_parser = commands.add_parser("ls", help="list recordings, newest first")
+    list_parser.add_argument("--limit", type=int, default=20)
+    list_parser.add_argument("--before", type=int, default=None, help="only list recordings with a smaller id")
+    list_parser.set_defaults(handler=list_recordings)
+
+    export_parser = commands.add_parser("export", help="copy or transcode a recording")
+    export_parser.add_argument("recording")
+    export_parser.add_argument("destination")
+    export_parser.add_argument("--format", default=None, help="container, e.g. WAV, FLAC or OGG (default: from extension)")
+    export_parser.add_argument("--subtype", default=None, help="sample format, e.g. PCM_16")
+    export_parser.set_defaults(handler=export)
+
+    bulk_parser = commands.add_parser("bulk-export", help="transcode every recording in a date range in parallel")
+    bulk_parser.add_argument("destination", help="directory to write the exported files to")
+    bulk_parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="first date or time, e.g. 2024-05-01")
+    bulk_parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="end date or time (exclusive)")
+    bulk_parser.add_argument("--day", type=datetime.fromisoformat, default=None, help="export a single day")
+    bulk_parser.add_argument("--format", choices=config.EXPORT_PRESETS, default=config.DEFAULT_EXPORT_PRESET)
+    bulk_parser.add_argument("--samplerate", type=int, default=None, help="resample to this rate (default: keep)")
+    bulk_parser.add_argument("--channels", type=int, default=None,
+                             help="output channel count (default: keep); 1 averages all channels, fewer keeps the "
+                                  "first ones, more repeats the source channels in order")
+    bulk_parser.add_argument("--workers", type=int, default=config.EXPORT_WORKERS,
+                             help="number of worker processes (default: CPU count)")
+    bulk_parser.set_defaults(handler=bulk_export)
+
+    stats_parser = commands.add_parser("stats", help="show library statistics")
+    stats_parser.set_defaults(handler=stats)
+
+    devices_parser = commands.add_parser("devices", help="list input devices")
+    devices_parser.set_defaults(handler=list_devices)
+    return parser
+
+def main(argv=None):
+    from .metrics import start_exporter
+    args = build_parser().parse_args(argv)
+    exporter = start_exporter(args.metrics)
+    try:
+        args.handler(args)
+    finally:
+        if exporter:
+            exporter.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,530 @@
+import os
+import queue
+import re
+import threading
+import uuid
+from time import perf_counter
+import numpy as np
+import sounddevice as sd
+import soundfile as sf
+from . import config
+from .buffers import RingBuffer
+from .levels import LevelMonitor
+from .metadata import collect_metadata
+from .metrics import registry
+from .peaks import PeakBuilder, get_peaks_path
+from .reader import describe_parts, open_reader
+from .utils import get_marker_path, get_part_path
+from .vad import VoiceActivityGate
+
+player_callback_seconds = registry.histogram("player_callback_seconds", "Time spent in the output stream callback")
+player_status_flags = registry.counter("player_status_flags_total", "Output callbacks reporting a non-empty status")
+player_buffer_underruns = registry.counter("player_buffer_underruns_total", "Output callbacks that found the playback queue empty")
+player_queue_blocks = registry.gauge("player_queue_blocks", "Blocks waiting in the playback queue")
+player_decode_seconds = registry.histogram("player_decode_seconds", "Time spent decoding a whole file for playback")
+player_block_decode_seconds = registry.histogram("player_block_decode_seconds", "Time spent decoding one streamed block")
+
+class RecorderMetrics:
+    def __init__(self, labels=None):
+        self.callback_seconds = registry.histogram("recorder_callback_seconds", "Time spent in the input stream callback", labels)
+        self.status_flags = registry.counter("recorder_status_flags_total", "Input callbacks reporting a non-empty status", labels)
+        self.buffer_frames = registry.gauge("recorder_buffer_frames", "Frames waiting in the recorder ring buffer", labels)
+        self.dropped_frames = registry.counter("recorder_dropped_frames_total", "Frames dropped because the ring buffer was full", labels)
+        self.write_seconds = registry.histogram("recorder_write_seconds", "Time spent writing one block to disk", labels)
+        self.frames_written = registry.counter("recorder_frames_written_total", "Frames written to recording files", labels)
+        self.file_bytes = registry.gauge("recorder_file_bytes", "Size of the current recording file", labels)
+        self.part_rotations = registry.counter("recorder_part_rotations_total", "Recording files rotated into a new part", labels)
+
+recorder_metrics = RecorderMetrics()
+
+SAMPLE_BYTES = {"PCM_S8": 1, "PCM_U8": 1, "PCM_16": 2, "PCM_24": 3, "PCM_32": 4, "FLOAT": 4, "DOUBLE": 8}
+HEADER_UPDATE_FORMATS = ("WAV", "WAVEX", "RF64")
+# libsndfile command id; the soundfile bindings do not export it
+SFC_UPDATE_HEADER_NOW = 0x1060
+
+def input_devices():
+    return [device["name"] for device in sd.query_devices() if device["max_input_channels"] > 0]
+
+class RecordingWriter:
+    def __init__(self, file_path, samplerate, channels, subtype=None, format=None,
+                 part_seconds=config.RECORDER_PART_SECONDS, part_bytes=config.RECORDER_PART_BYTES,
+                 metrics=recorder_metrics):
+        self.file_path = file_path
+        self.metrics = metrics
+        self.part_path = file_path
+        self.parts = 1
+        self.samplerate = samplerate
+        self.channels = channels
+        self.subtype = subtype
+        self.format = format
+        self.file = self._open_part(file_path)
+        open(get_marker_path(file_path), "w").close()
+        self.part_frames = int(part_seconds * samplerate) if part_seconds else None
+        sample_bytes = SAMPLE_BYTES.get(self.file.subtype)
+        if part_bytes and sample_bytes:
+            byte_frames = part_bytes // (sample_bytes * channels)
+            self.part_frames = min(self.part_frames, byte_frames) if self.part_frames else byte_frames
+        self.peak_builder = PeakBuilder(samplerate, channels)
+        self._part_written = 0
+        self._flushed_at = perf_counter()
+
+    def _open_part(self, path):
+        return sf.SoundFile(path, mode='x', samplerate=self.samplerate, channels=self.channels,
+                            subtype=self.subtype, format=self.format)
+
+    def write(self, data):
+        while len(data):
+            if self.part_frames and self._part_written >= self.part_frames:
+                self._rotate()
+            count = len(data) if not self.part_frames else min(len(data), self.part_frames - self._part_written)
+            chunk, data = data[:count], data[count:]
+            started_at = perf_counter()
+            self.file.write(chunk)
+            self.metrics.write_seconds.observe(perf_counter() - started_at)
+            self._part_written += count
+            self.peak_builder.add(chunk)
+            self.metrics.frames_written.inc(count)
+        if perf_counter() - self._flushed_at >= config.RECORDER_HEADER_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if self.file.format in HEADER_UPDATE_FORMATS:
+            sf._snd.sf_command(self.file._file, SFC_UPDATE_HEADER_NOW, sf._ffi.NULL, 0)
+        self.file.flush()
+        self._flushed_at = perf_counter()
+
+    def _rotate(self):
+        self.file.close()
+        self.parts += 1
+        self.part_path = get_part_path(self.file_path, self.parts)
+        self.file = self._open_part(self.part_path)
+        self._part_written = 0
+        self.metrics.part_rotations.inc()
+
+    def close(self):
+        channels, subtype = self.file.channels, self.file.subtype
+        self.file.close()
+        peak_pyramid = self.peak_builder.finish()
+        peak_pyramid.save(get_peaks_path(self.file_path))
+        info = collect_metadata(self.file_path, peak_pyramid, channels, subtype)
+        os.remove(get_marker_path(self.file_path))
+        return info
+
+class Recorder:
+    def __init__(self, file_path, samplerate=44100, channels=2, subtype=None, format=None, on_levels=None,
+                 vad=None, on_segment=None, device=None, metric_labels=None):
+        self.is_running = False
+        self.device = device
+        self.metrics = RecorderMetrics(metric_labels) if metric_labels else recorder_metrics
+        self.start_barrier = None
+        self.first_frame_time = None
+        self.on_levels = on_levels
+        self.on_segment = on_segment
+        self.file_path = file_path
+        self.samplerate  = samplerate
+        self.channels = channels
+        self.subtype = subtype
+        self.format = format
+        self.vad = vad
+        self.buffer = None
+        self.info = None
+        self.segments = []
+        self.parts = {}
+        self.xruns = 0
+        self.input_overflows = 0
+        self.input_underflows = 0
+        self._writer = None
+        self._gate = None
+        self._segment_start = 0
+        self._reported_dropped_frames = 0
+        self._monitored_frames = 0
+        self._stop_requested = threading.Event()
+
+    def run(self):
+        self.is_running = True
+        self._stop_requested.clear()
+        buffer = RingBuffer(int(self.samplerate * config.RECORDER_BUFFER_SECONDS), self.channels)
+        self.buffer = buffer
+        self.segments = []
+        self.parts = {}
+        self._reported_dropped_frames = 0
+        self._monitored_frames = 0
+        self.first_frame_time = None
+        monitor = LevelMonitor(self.samplerate, self.channels, config.RECORDER_MONITOR_COLUMN_SECONDS) if self.on_levels else None
+        self._gate = VoiceActivityGate(self.samplerate, self.channels) if self.vad else None
+        metrics = self.metrics
+        def callback(indata, frames, time, status):
+            started_at = perf_counter()
+            if self.first_frame_time is None:
+                # Some host APIs report no ADC time (0) or one from a different clock; use the callback time then.
+                adc_time, current_time = time.inputBufferAdcTime, time.currentTime
+                self.first_frame_time = started_at - (current_time - adc_time) if 0 < adc_time <= current_time else started_at
+            if status:
+                self.xruns += 1
+                metrics.status_flags.inc()
+                if status.input_overflow:
+                    self.input_overflows += 1
+                if status.input_underflow:
+                    self.input_underflows += 1
+            buffer.write(indata)
+            metrics.callback_seconds.observe(perf_counter() - started_at)
+
+        if self.vad != "split":
+            self._writer = self._open_writer(self.file_path)
+        try:
+            if self.start_barrier:
+                try:
+                    self.start_barrier.wait(config.SESSION_START_TIMEOUT)
+                except threading.BrokenBarrierError:
+                    pass
+            with sd.InputStream(samplerate=self.samplerate, channels=self.channels, dtype='float32', callback=callback,
+                                device=self.device):
+                interval = config.RECORDER_MONITOR_INTERVAL if monitor else config.RECORDER_WRITE_INTERVAL
+                next_write = perf_counter() + config.RECORDER_WRITE_INTERVAL
+                while self.is_running:
+                    self._stop_requested.wait(interval)
+                    if monitor:
+                        self._monitor(buffer, monitor)
+                    if not monitor or perf_counter() >= next_write:
+                        next_write = perf_counter() + config.RECORDER_WRITE_INTERVAL
+                        self._drain(buffer)
+            self._drain(buffer)
+            if self._gate:
+                self._process_events(self._gate.flush())
+        finally:
+            info = self._close_writer()
+        if self.vad != "split":
+            self.info = info
+
+    def _open_writer(self, file_path):
+        return RecordingWriter(file_path, self.samplerate, self.channels, self.subtype, self.format, metrics=self.metrics)
+
+    def _close_writer(self):
+        if self._writer is None:
+            return None
+        writer, self._writer = self._writer, None
+        info = writer.close()
+        if writer.parts > 1:
+            self.parts[writer.file_path] = describe_parts(writer.file_path)
+        return info
+
+    def recordings(self):
+        return [] if self.vad == "split" else [(self.file_path, {})]
+
+    def results(self):
+        return [(self.file_path, self.info)] if self.info else []
+
+    def segment_path(self, number):
+        root, extension = os.path.splitext(self.file_path)
+        return f"{root}{number:03d}{extension}"
+
+    def _process_events(self, events):
+        for event, value in events:
+            if event == "audio":
+                if self._writer:
+                    self._writer.write(value)
+            elif self.vad != "split":
+                continue
+            elif event == "start":
+                self._segment_start = value
+                self._writer = self._open_writer(self.segment_path(len(self.segments) + 1))
+            elif event == "stop" and self._writer:
+                file_path = self._writer.file_path
+                info = self._close_writer()
+                start_offset = self._segment_start / self.samplerate
+                self.segments.append((file_path, start_offset, info))
+                if self.on_segment:
+                    self.on_segment(file_path, start_offset, info)
+
+    def _drain(self, buffer):
+        self.metrics.buffer_frames.set(buffer.available)
+        dropped_frames = buffer.dropped_frames
+        frames = 0
+        for segment in buffer.peek():
+            if self._gate:
+                self._process_events(self._gate.process(segment))
+            else:
+                self._writer.write(segment)
+            frames += len(segment)
+        buffer.advance(frames)
+        self._monitored_frames = max(0, self._monitored_frames - frames)
+        self.metrics.dropped_frames.inc(dropped_frames - self._reported_dropped_frames)
+        self._reported_dropped_frames = dropped_frames
+        if self._writer:
+            self.metrics.file_bytes.set(os.path.getsize(self._writer.part_path))
+
+    def _monitor(self, buffer, monitor):
+        offset = self._monitored_frames
+        new_data = []
+        for segment in buffer.peek():
+            if offset < len(segment):
+                new_data.append(segment[offset:])
+            offset = max(0, offset - len(segment))
+        if not new_data:
+            return
+        data = new_data[0] if len(new_data) == 1 else np.concatenate(new_data)
+        self._monitored_frames += len(data)
+        self.on_levels(monitor.add(data))
+
+    @property
+    def stats(self):
+        return {
+            "xruns": self.xruns,
+            "input_overflows": self.input_overflows,
+            "input_underflows": self.input_underflows,
+            "buffer_overflows": self.buffer.overflows if self.buffer else 0,
+            "dropped_frames": self.buffer.dropped_frames if self.buffer else 0,
+        }
+
+    def stop(self):
+        self.is_running = False
+        self._stop_requested.set()
+
+class RecordingSession:
+    def __init__(self, file_path, devices, samplerate=44100, channels=2, subtype=None, format=None, vad=None,
+                 on_levels=None, on_segment=None):
+        self.session_id = uuid.uuid4().hex
+        self.file_path = file_path
+        self.on_segment = on_segment
+        self.clock_origin = None
+        self.recorders = []
+        self.device_names = []
+        self.errors = {}
+        for number, device in enumerate(devices, 1):
+            device_info = sd.query_devices(device)
+            device_name = device_info["name"]
+            recorder = Recorder(self.device_file_path(number, device_name), samplerate,
+                                min(channels, device_info["max_input_channels"]) or channels, subtype, format,
+                                on_levels=on_levels if number == 1 else None, vad=vad,
+                                on_segment=self._segment_callback(device_name), device=device,
+                                metric_labels={"input": number, "device": device_name})
+            self.recorders.append(recorder)
+            self.device_names.append(device_name)
+
+    def device_file_path(self, number, device_name):
+        root, extension = os.path.splitext(self.file_path)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", device_name).strip("-")[:32]
+        return f"{root}{number}-{slug}{extension}"
+
+    def run(self):
+        barrier = threading.Barrier(len(self.recorders))
+        threads = []
+        self.clock_origin = perf_counter()
+        for recorder, device_name in zip(self.recorders, self.device_names):
+            recorder.start_barrier = barrier
+            threads.append(threading.Thread(target=self._run_recorder, args=(recorder, device_name, barrier),
+                                            name=f"recorder {device_name}"))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _run_recorder(self, recorder, device_name, barrier):
+        try:
+            recorder.run()
+        except Exception as e:
+            self.errors[device_name] = e
+            barrier.abort()
+
+    def _segment_callback(self, device_name):
+        def on_segment(file_path, start_offset, info):
+            recorder = self.recorders[self.device_names.index(device_name)]
+            start_offset += self.start_offset(recorder) or 0.0
+            fields = dict(info, session_id=self.session_id, device_name=device_name, start_offset=start_offset)
+            if self.on_segment:
+                self.on_segment(file_path, start_offset, fields)
+        return on_segment
+
+    def start_offset(self, recorder):
+        if recorder.first_frame_time is None or self.clock_origin is None:
+            return None
+        return recorder.first_frame_time - self.clock_origin
+
+    def recordings(self):
+        return [(file_path, {"session_id": self.session_id, "device_name": device_name})
+                for recorder, device_name in zip(self.recorders, self.device_names)
+                for file_path, _ in recorder.recordings()]
+
+    def results(self):
+        return [(file_path, dict(info, session_id=self.session_id, device_name=device_name,
+                                 start_offset=self.start_offset(recorder)))
+                for recorder, device_name in zip(self.recorders, self.device_names)
+                for file_path, info in recorder.results()]
+
+    @property
+    def segments(self):
+        return [segment for recorder in self.recorders for segment in recorder.segments]
+
+    @property
+    def parts(self):
+        return {file_path: parts for recorder in self.recorders for file_path, parts in recorder.parts.items()}
+
+    @property
+    def stats(self):
+        stats = {}
+        for recorder in self.recorders:
+            for key, value in recorder.stats.items():
+                stats[key] = stats.get(key, 0) + value
+        return stats
+
+    def stop(self):
+        for recorder in self.recorders:
+            recorder.stop()
+
+class Player:
+    def __init__(self, file_path, streaming=config.STREAMING_PLAYBACK, progress_rate=config.PLAYBACK_PROGRESS_RATE,
+                 cache=None, on_progress=None, start=0.0, paused=False):
+        self.file_path = file_path
+        self.start = start
+        self.on_progress = on_progress
+        self.streaming = streaming
+        self.cache = cache
+        self.progress_interval = 1.0 / progress_rate
+        self.is_playing = False
+        self.is_paused = paused
+        self.position = 0
+        self.frames = 0
+        self.audio_data = None
+        self.sample_rate = None
+        self._stream_finished = threading.Event()
+        cached = self.cache.get(file_path) if self.cache else None
+        if cached is not None:
+            self.streaming = False
+            self._set_audio(*cached)
+        elif not self.streaming:
+            self.load_audio()
+    
+    def load_audio(self):
+        cached = self.cache.load(self.file_path) if self.cache else None
+        if cached is None:
+            with player_decode_seconds.time(), open_reader(self.file_path) as reader:
+                cached = reader.read(0, reader.frames), reader.samplerate
+        self._set_audio(*cached)
+
+    def _set_audio(self, audio_data, sample_rate):
+        self.audio_data, self.sample_rate = audio_data, sample_rate
+        self.frames = len(self.audio_data)
+
+    def run(self):
+        if self.is_playing:
+            return
+        self.is_playing = True
+        self._stream_finished.clear()
+        if self.streaming:
+            self._play_stream()
+        else:
+            self._play_memory()
+        duration = self.frames / self.sample_rate
+        if self.on_progress:
+            self.on_progress(duration, duration)
+        self.is_playing = False
+
+    def _start_frame(self):
+        return min(max(0, int(self.start * self.sample_rate)), self.frames)
+
+    def _play_memory(self):
+        self.position = self._start_frame()
+        def callback(outdata, frames, time, status):
+            started_at = perf_counter()
+            if status:
+                player_status_flags.inc()
+            if self.is_paused:
+                outdata.fill(0)
+                return
+            chunk = self.audio_data[self.position:self.position + frames]
+            outdata[:len(chunk)] = chunk
+            outdata[len(chunk):].fill(0)
+            self.position += len(chunk)
+            player_callback_seconds.observe(perf_counter() - started_at)
+            if len(chunk) < frames:
+                raise sd.CallbackStop
+
+        with self._open_stream(callback, self.audio_data.shape[1]):
+            self._run_clock()
+
+    def _play_stream(self):
+        buffer = queue.Queue(maxsize=config.PLAYBACK_BUFFER_BLOCKS)
+
+        def callback(outdata, frames, time, status):
+            started_at = perf_counter()
+            if status:
+                player_status_flags.inc()
+            if self.is_paused:
+                outdata.fill(0)
+                return
+            try:
+                data = buffer.get_nowait()
+            except queue.Empty:
+                player_buffer_underruns.inc()
+                outdata.fill(0)
+                return
+            if data is None:
+                outdata.fill(0)
+                raise sd.CallbackStop
+            outdata[:] = data
+            self.position += frames
+            player_callback_seconds.observe(perf_counter() - started_at)
+
+        with open_reader(self.file_path) as reader:
+            self.sample_rate = reader.samplerate
+            self.frames = reader.frames
+            self.position = self._start_frame()
+            blocks = reader.blocks(config.PLAYBACK_BLOCK_SIZE, self.position)
+            for data in blocks:
+                buffer.put_nowait(data)
+                if buffer.full():
+                    break
+            feeder = threading.Thread(target=self._feed_blocks, args=(blocks, buffer), daemon=True)
+            with self._open_stream(callback, reader.channels):
+                feeder.start()
+                self._run_clock(buffer)
+            feeder.join()
+
+    def _open_stream(self, callback, channels):
+        return sd.OutputStream(samplerate=self.sample_rate, blocksize=config.PLAYBACK_BLOCK_SIZE,
+                               channels=channels, dtype='float32',
+                               callback=callback, finished_callback=self._stream_finished.set)
+
+    def _run_clock(self, buffer=None):
+        last_position = None
+        while self.is_playing and not self._stream_finished.wait(self.progress_interval):
+            if buffer is not None:
+                player_queue_blocks.set(buffer.qsize())
+            if self.position != last_position:
+                last_position = self.position
+                self._emit_progress()
+
+    def _emit_progress(self):
+        if self.on_progress:
+            self.on_progress(min(self.position, self.frames) / self.sample_rate, self.frames / self.sample_rate)
+
+    def _feed_blocks(self, blocks, buffer):
+        while True:
+            started_at = perf_counter()
+            data = next(blocks, None)
+            if data is None:
+                break
+            player_block_decode_seconds.observe(perf_counter() - started_at)
+            if not self._put_block(buffer, data):
+                return
+        self._put_block(buffer, None)
+
+    def _put_block(self, buffer, data):
+        while self.is_playing:
+            try:
+                buffer.put(data, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def pause(self):
+        self.is_paused = True
+
+    def resume(self):
+        self.is_paused = False
+
+    def stop(self):
+        self.is_playing = False
+        self.is_paused = False
+        self._stream_finished.set()
@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+import signal
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import soundfile as sf
+from . import config
+from .reader import open_reader
+from .resample import Resampler, remix
+
+ExportJob = namedtuple("ExportJob", ["source_path", "destination_path", "duration"])
+ExportResult = namedtuple("ExportResult", ["source_path", "destination_path", "size_bytes", "error"])
+
+class ExportCancelled(Exception):
+    pass
+
+def export_file(source_path, destination_path, format=None, subtype=None, samplerate=None, channels=None,
+                should_stop=None):
+    with open_reader(source_path) as source:
+        samplerate = samplerate or source.samplerate
+        channels = channels or source.channels
+        resampler = Resampler(source.samplerate, samplerate, channels) if samplerate != source.samplerate else None
+        destination = sf.SoundFile(destination_path, mode='x', samplerate=samplerate, channels=channels,
+                                   format=format, subtype=subtype)
+        try:
+            with destination:
+                for start in range(0, source.frames, config.EXPORT_BLOCK_SIZE):
+                    if should_stop and should_stop():
+                        raise ExportCancelled(destination_path)
+                    block = remix(source.read(start, config.EXPORT_BLOCK_SIZE), channels)
+                    destination.write(resampler.process(block) if resampler else block)
+                if resampler:
+                    destination.write(resampler.flush())
+        except BaseException:
+            os.remove(destination_path)
+            raise
+    return os.path.getsize(destination_path)
+
+def select_recordings(session, since=None, until=None):
+    from .models import RecordingFile
+    query = session.query(RecordingFile).filter(RecordingFile.missing.isnot(True))
+    if since:
+        query = query.filter(RecordingFile.created_at >= since)
+    if until:
+        query = query.filter(RecordingFile.created_at < until)
+    return query.order_by(RecordingFile.created_at, RecordingFile.id).all()
+
+def plan_exports(recordings, destination_dir, preset):
+    extension = config.EXPORT_PRESETS[preset]["extension"]
+    return [ExportJob(recording.file_path,
+                      os.path.join(destination_dir, os.path.splitext(recording.file_name)[0] + extension),
+                      recording.duration or 0.0)
+            for recording in recordings if recording.file_path and os.path.exists(recording.file_path)]
+
+_cancel_event = None
+
+def _init_worker(cancel_event):
+    global _cancel_event
+    _cancel_event = cancel_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _export_job(job, options):
+    if _cancel_event.is_set():
+        return ExportResult(job.source_path, job.destination_path, None, "cancelled")
+    try:
+        size = export_file(job.source_path, job.destination_path, should_stop=_cancel_event.is_set, **options)
+    except ExportCancelled:
+        return ExportResult(job.source_path, job.destination_path, None, "cancelled")
+    except (OSError, RuntimeError, ValueError) as e:
+        return ExportResult(job.source_path, job.destination_path, None, str(e))
+    return ExportResult(job.source_path, job.destination_path, size, None)
+
+class BulkExporter:
+    def __init__(self, jobs, preset=config.DEFAULT_EXPORT_PRESET, samplerate=None, channels=None,
+                 workers=config.EXPORT_WORKERS):
+        self.jobs = jobs
+        self.workers = workers
+        preset = config.EXPORT_PRESETS[preset]
+        self.options = {"format": preset["format"], "subtype": preset["subtype"], "samplerate": samplerate,
+                        "channels": channels}
+        self._context = multiprocessing.get_context("spawn")
+        self._cancel_event = self._context.Event()
+
+    def run(self, on_progress=None):
+        total = sum(job.duration for job in self.jobs)
+        done = 0.0
+        results = []
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context, initializer=_init_worker,
+                                 initargs=(self._cancel_event,)) as pool:
+            futures = {pool.submit(_export_job, job, self.options): job for job in self.jobs}
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                done += futures[future].duration
+                if on_progress:
+                    on_progress(len(results), len(self.jobs), done, total, result)
+        return results
+
+    @property
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
@@ -1,75 +1,987 @@
-import sys, os
-import matplotlib.pyplot as plt
+import sys, os, math, queue
 import qdarkstyle
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from PyQt5 import QtCore, QtWidgets, QtGui
 from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QWidget, QMainWindow, QProgressBar
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from pynput import keyboard
-from .audio_tools import AudioProcessor, KeyInputController
-from .models import RecordingFile, Session
+from .hotkeys import HotkeyService
+from .library import LIBRARY_SORT_COLUMNS, LibraryQuery, RecordingEntry, RecordingIndex, entry_from_record
+from .metrics import registry, start_exporter
+from .startup import profiler
 from . import config, utils
 
-session = Session()
+waveform_render_seconds = registry.histogram("waveform_render_seconds", "Time spent drawing the waveform")
+
+class StartupWorker(QtCore.QThread):
+    modules_ready = QtCore.pyqtSignal()
+    library_ready = QtCore.pyqtSignal(object, object)
+    recovery_finished = QtCore.pyqtSignal(object)
+
+    def run(self):
+        profiler.mark("startup worker started")
+        from . import audio_tools
+        profiler.mark("audio modules imported")
+        if config.WAVEFORM_RENDERER == "matplotlib":
+            import matplotlib.pyplot
+            from matplotlib.backends import backend_qt5agg
+            profiler.mark("matplotlib imported")
+        try:
+            import pynput.keyboard
+        except ImportError:
+            pass
+        profiler.mark("hotkey modules imported")
+        from . import persistence
+        from .models import Session
+        profiler.mark("database modules imported")
+        self.modules_ready.emit()
+        from sqlalchemy.exc import SQLAlchemyError
+        index = RecordingIndex()
+        error = None
+        try:
+            session = Session()
+            try:
+                index.load(session)
+            finally:
+                session.close()
+        except SQLAlchemyError as e:
+            error = e
+        profiler.mark("recording index loaded")
+        self.library_ready.emit(index, error)
+        from .recovery import recover_recordings
+        recovered = recover_recordings()
+        if recovered:
+            self.recovery_finished.emit(recovered)
+
+class ScannerThread(QtCore.QThread):
+    scan_finished = QtCore.pyqtSignal(object)
+
+    def __init__(self, scanner):
+        super().__init__()
+        self.scanner = scanner
+        self.full = True
+
+    def run(self):
+        from sqlalchemy.exc import SQLAlchemyError
+        from .models import Session
+        try:
+            session = Session()
+            try:
+                result = self.scanner.reconcile(session, full=self.full)
+            finally:
+                session.close()
+        except (SQLAlchemyError, OSError):
+            return
+        self.full = False
+        self.scan_finished.emit(result)
+
+class LevelMeter(QWidget):
+    MIN_DB = -60.0
 
-class WaveformViewer(QWidget):
     def __init__(self):
         super().__init__()
+        self.peak = self.rms = ()
+        self.setFixedHeight(16)
+
+    def set_levels(self, peak, rms):
+        self.peak, self.rms = peak, rms
+        self.update()
+
+    def _fraction(self, value):
+        db = 20 * math.log10(max(float(value), 1e-6))
+        return min(1.0, max(0.0, (db - self.MIN_DB) / -self.MIN_DB))
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        channels = max(1, len(self.peak))
+        row_height = self.height() / channels
+        for channel, (peak, rms) in enumerate(zip(self.peak, self.rms)):
+            top = int(channel * row_height)
+            height = max(1, int(row_height) - 1)
+            color = QtGui.QColor("red") if peak >= config.LEVEL_CLIP_THRESHOLD else QtGui.QColor("orange")
+            painter.fillRect(0, top, int(self._fraction(rms) * self.width()), height, color)
+            x = int(self._fraction(peak) * (self.width() - 1))
+            painter.fillRect(x, top, 2, height, color.lighter())
+        painter.end()
+
+class LiveEnvelopeView(QWidget):
+    def __init__(self):
+        super().__init__()
+        self._pixmap = None
+
+    def clear(self):
+        self._pixmap = QtGui.QPixmap(max(1, self.width()), max(1, self.height()))
+        self._pixmap.fill(self.palette().color(QtGui.QPalette.Window))
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.clear()
+
+    def append(self, mins, maxs):
+        columns = len(mins)
+        if self._pixmap is None or not columns:
+            return
+        width, height = self._pixmap.width(), self._pixmap.height()
+        mins, maxs = mins[-width:], maxs[-width:]
+        columns = len(mins)
+        self._pixmap.scroll(-columns, 0, self._pixmap.rect())
+        painter = QtGui.QPainter(self._pixmap)
+        left = width - columns
+        painter.fillRect(left, 0, columns, height, self.palette().color(QtGui.QPalette.Window))
+        painter.setPen(QtGui.QColor("orange"))
+        middle = height / 2
+        for column, (low, high) in enumerate(zip(mins, maxs)):
+            painter.drawLine(left + column, int(middle - high * middle), left + column, int(middle - low * middle))
+        painter.end()
+        self.update()
+
+    def paintEvent(self, event):
+        if self._pixmap is not None:
+            painter = QtGui.QPainter(self)
+            painter.drawPixmap(0, 0, self._pixmap)
+            painter.end()
+
+class QtWaveformCanvas(QWidget):
+    clicked = QtCore.pyqtSignal(float, int)
+    scrolled = QtCore.pyqtSignal(float, bool)
+
+    def __init__(self):
+        super().__init__()
+        self.widget = self
+        self._pixmap = None
+        self._envelope = None
+        self._text = ""
+        self._range = (0.0, 1.0)
+        self._playhead = None
+
+    def clear(self):
+        self._envelope = None
+        self._text = ""
+        self._playhead = None
+        self._render()
+
+    def show_text(self, text):
+        self._text = text
+        self._render()
+
+    def draw_envelope(self, mins, maxs, start, stop):
+        self._envelope = (mins, maxs)
+        self._range = (start, stop)
+        self._text = ""
+        self._render()
+
+    def set_playhead(self, seconds):
+        old_x, self._playhead = self._x_at(self._playhead), seconds
+        new_x = self._x_at(seconds)
+        if old_x != new_x:
+            for x in (old_x, new_x):
+                if x is not None:
+                    self.update(x - 1, 0, 3, self.height())
+
+    def _x_at(self, seconds):
+        start, stop = self._range
+        if seconds is None or self._envelope is None or not start <= seconds <= stop:
+            return None
+        return int((seconds - start) / max(stop - start, 1e-9) * (self.width() - 1))
+
+    def _seconds_at(self, x):
+        start, stop = self._range
+        return start + x / max(self.width() - 1, 1) * (stop - start)
+
+    def _render(self):
+        self._pixmap = QtGui.QPixmap(max(1, self.width()), max(1, self.height()))
+        self._pixmap.fill(self.palette().color(QtGui.QPalette.Window))
+        painter = QtGui.QPainter(self._pixmap)
+        if self._envelope is not None and len(self._envelope[0]):
+            mins, maxs = self._envelope
+            columns = len(mins)
+            step = self.width() / columns
+            middle = self.height() / 2
+            top = [QtCore.QPointF((column + 0.5) * step, middle - value * middle) for column, value in enumerate(maxs)]
+            bottom = [QtCore.QPointF((column + 0.5) * step, middle - value * middle) for column, value in enumerate(mins)]
+            painter.setPen(QtGui.QColor("orange"))
+            painter.setBrush(QtGui.QColor("orange"))
+            painter.drawPolygon(QtGui.QPolygonF(top + bottom[::-1]))
+        if self._text:
+            painter.setPen(self.palette().color(QtGui.QPalette.WindowText))
+            painter.drawText(self._pixmap.rect(), QtCore.Qt.AlignCenter | QtCore.Qt.TextWordWrap, self._text)
+        painter.end()
+        self.update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._render()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        if self._pixmap is not None:
+            painter.drawPixmap(event.rect(), self._pixmap, event.rect())
+        x = self._x_at(self._playhead)
+        if x is not None:
+            painter.setPen(QtGui.QPen(self.palette().color(QtGui.QPalette.WindowText), 1))
+            painter.drawLine(x, 0, x, self.height())
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if self._envelope is None:
+            return
+        button = {QtCore.Qt.LeftButton: 1, QtCore.Qt.RightButton: 3}.get(event.button())
+        if button:
+            self.clicked.emit(self._seconds_at(event.x()), button)
+
+    def wheelEvent(self, event):
+        if self._envelope is not None and event.angleDelta().y():
+            self.scrolled.emit(self._seconds_at(event.x()), event.angleDelta().y() > 0)
+
+class MatplotlibWaveformCanvas(QtCore.QObject):
+    clicked = QtCore.pyqtSignal(float, int)
+    scrolled = QtCore.pyqtSignal(float, bool)
+
+    def __init__(self):
+        super().__init__()
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
         plt.style.use('ggplot')
         self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvas(self.figure)
+        self.widget = FigureCanvas(self.figure)
+        self.widget.mpl_connect('button_press_event', self._on_click)
+        self.widget.mpl_connect('scroll_event', self._on_scroll)
+        self._has_envelope = False
+
+    def clear(self):
+        self._has_envelope = False
+        self.ax.clear()
+        self.ax.set_xlabel('')
+        self.ax.set_ylabel('')
+        self.ax.set_axis_off()
+        self.widget.draw()
+
+    def show_text(self, text):
+        self.ax.text(0.5, 0.5, text, horizontalalignment='center', verticalalignment='center', transform=self.ax.transAxes)
+        self.widget.draw()
+
+    def draw_envelope(self, mins, maxs, start, stop):
+        import numpy as np
+        self._has_envelope = True
+        x = start + (np.arange(len(mins)) + 0.5) * (stop - start) / max(len(mins), 1)
+        self.ax.clear()
+        self.ax.fill_between(x, mins, maxs, color='orange', linewidth=0.5, edgecolor='orange')
+        self.ax.set_xlim(start, max(stop, start + 1e-9))
+        self.ax.set_axis_off()
+        self.widget.draw()
+
+    def set_playhead(self, seconds):
+        pass
+
+    def _on_click(self, event):
+        if self._has_envelope and event.xdata is not None and event.button in (1, 3):
+            self.clicked.emit(event.xdata, int(event.button))
+
+    def _on_scroll(self, event):
+        if self._has_envelope and event.xdata is not None:
+            self.scrolled.emit(event.xdata, event.button == 'up')
+
+class WaveformViewer(QWidget):
+    seek_requested = QtCore.pyqtSignal(float)
+
+    def __init__(self):
+        super().__init__()
+        self.canvas = None
+        self.peak_pyramid = None
+        self.file_path = None
+        self.reader = None
+        self.view = (0, 0)
+        self.placeholder = QtWidgets.QLabel()
+        self.placeholder.setAlignment(QtCore.Qt.AlignCenter)
+        self.live_view = LiveEnvelopeView()
+        self.level_meter = LevelMeter()
         self.layout = QVBoxLayout()
         self.timer_bar = QProgressBar()
-        self.layout.addWidget(self.canvas)
+        self.layout.addWidget(self.placeholder)
+        self.layout.addWidget(self.live_view)
+        self.layout.addWidget(self.level_meter)
         self.layout.addWidget(self.timer_bar)
+        self.live_view.hide()
+        self.level_meter.hide()
         self.setLayout(self.layout)
         self.reset_layout()
 
+    def create_canvas(self):
+        if self.canvas:
+            return
+        if config.WAVEFORM_RENDERER == "matplotlib":
+            self.canvas = MatplotlibWaveformCanvas()
+        else:
+            self.canvas = QtWaveformCanvas()
+        self.canvas.clicked.connect(self._on_click)
+        self.canvas.scrolled.connect(self._on_scroll)
+        self.layout.replaceWidget(self.placeholder, self.canvas.widget)
+        self.placeholder.hide()
+        self.canvas.widget.setVisible(not self.live_view.isVisible())
+        text = self.placeholder.text()
+        self.reset_layout()
+        if text:
+            self.display_text(text)
+
+    def _waveform_widget(self):
+        return self.canvas.widget if self.canvas else self.placeholder
+
+    def start_live(self):
+        self._waveform_widget().hide()
+        self.live_view.show()
+        self.level_meter.show()
+        self.live_view.clear()
+        self.level_meter.set_levels((), ())
+        self.timer_bar.setMaximum(1)
+        self.timer_bar.setValue(0)
+        self.timer_bar.setFormat("0.0 seconds")
+
+    def stop_live(self):
+        if self.live_view.isVisible():
+            self.live_view.hide()
+            self.level_meter.hide()
+            self._waveform_widget().show()
+
+    def update_levels(self, levels):
+        self.live_view.append(levels.mins, levels.maxs)
+        self.level_meter.set_levels(levels.peak, levels.rms)
+        self.timer_bar.setFormat(f"{levels.elapsed:.1f} seconds")
+
     def reset_layout(self):
-        self.ax.clear()
-        self.ax.set_xlabel('')
-        self.ax.set_ylabel('')
-        self.ax.set_axis_off()
-        self.canvas.draw()
+        self.stop_live()
+        self._set_file(None, None)
+        if self.canvas:
+            self.canvas.clear()
+        else:
+            self.placeholder.clear()
         self.timer_bar.setMaximum(0)
         self.timer_bar.setValue(0)
         self.timer_bar.setFormat("0/0 seconds")
 
     def display_text(self, text="Press the Play Button to Play the Last Recording."):
-        self.ax.text(0.5, 0.5, text, horizontalalignment='center', verticalalignment='center', transform=self.ax.transAxes)    
-        self.canvas.draw()
+        if not self.canvas:
+            self.placeholder.setText(text)
+            return
+        self.canvas.show_text(text)
 
-    def update_waveform(self, waveform_data):
-        self.ax.clear()
-        self.ax.plot(waveform_data, color='orange')
-        self.ax.set_axis_off()
-        self.canvas.draw()
+    def _set_file(self, peak_pyramid, file_path):
+        if self.reader:
+            self.reader.close()
+        self.peak_pyramid, self.file_path, self.reader = peak_pyramid, file_path, None
+        self.view = (0, peak_pyramid.frames if peak_pyramid else 0)
+
+    def update_waveform(self, peak_pyramid, file_path=None):
+        self.create_canvas()
+        self._set_file(peak_pyramid, file_path)
+        self.draw_waveform()
+
+    def show_pending(self, text):
+        self.create_canvas()
+        self._set_file(None, None)
+        self.canvas.clear()
+        self.display_text(text)
+
+    def draw_waveform(self):
+        with waveform_render_seconds.time():
+            start, stop = self.view
+            mins, maxs = self._envelope(self.canvas.widget.width())
+            samplerate = self.peak_pyramid.samplerate or 1
+            self.canvas.draw_envelope(mins, maxs, start / samplerate, stop / samplerate)
+
+    def _envelope(self, width):
+        start, stop = self.view
+        if self.file_path and (stop - start) / max(width, 1) < self.peak_pyramid.block_size:
+            import numpy as np
+            from .reader import open_reader
+            if self.reader is None:
+                self.reader = open_reader(self.file_path)
+            data = self.reader.read(start, stop - start)
+            if len(data):
+                edges = np.linspace(0, len(data), min(width, len(data)), endpoint=False).astype(np.int64)
+                return np.minimum.reduceat(data.min(axis=1), edges), np.maximum.reduceat(data.max(axis=1), edges)
+        return self.peak_pyramid.envelope(width, start, stop)
+
+    def zoom(self, center, factor):
+        start, stop = self.view
+        frames = self.peak_pyramid.frames
+        span = int(min(frames, max(self.canvas.widget.width(), (stop - start) * factor)))
+        center = center * self.peak_pyramid.samplerate
+        new_start = int(center - (center - start) * span / max(stop - start, 1))
+        new_start = min(max(0, new_start), frames - span)
+        if (new_start, new_start + span) != self.view:
+            self.view = (new_start, new_start + span)
+            self.draw_waveform()
+
+    def _on_click(self, seconds, button):
+        if self.peak_pyramid is None:
+            return
+        if button == 1:
+            self.seek_requested.emit(max(0.0, min(seconds, self.peak_pyramid.duration)))
+        elif button == 3:
+            self.view = (0, self.peak_pyramid.frames)
+            self.draw_waveform()
+
+    def _on_scroll(self, seconds, zoom_in):
+        if self.peak_pyramid is None:
+            return
+        self.zoom(seconds, 1 / config.WAVEFORM_ZOOM_STEP if zoom_in else config.WAVEFORM_ZOOM_STEP)
+
+    def update_playhead(self, elapsed_time):
+        if self.canvas:
+            self.canvas.set_playhead(elapsed_time)
 
     def update_timer_bar(self, elapsed_time, duration):
         self.timer_bar.setMaximum(int(duration*100))
         self.timer_bar.setValue(int(elapsed_time*100))
         self.timer_bar.setFormat(f"{round(elapsed_time,2)} / {round(duration,2)} seconds")
 
+class MetricsPanel(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle(config.APPLICATION_TITLE + " Stats")
+        self.resize(520, 360)
+        self.text = QtWidgets.QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        layout = QVBoxLayout()
+        layout.addWidget(self.text)
+        self.setLayout(layout)
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start(config.METRICS_PANEL_REFRESH_MS)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def refresh(self):
+        lines = []
+        for name, value in sorted(registry.snapshot().items()):
+            if isinstance(value, dict):
+                if name.endswith("_seconds"):
+                    value = (f"n={value['count']} p50={value['p50'] * 1000:.2f}ms p95={value['p95'] * 1000:.2f}ms "
+                             f"p99={value['p99'] * 1000:.2f}ms max={value['max'] * 1000:.2f}ms")
+                else:
+                    value = f"n={value['count']} p50={value['p50']} p95={value['p95']} max={value['max']}"
+            lines.append(f"{name:34s} {value}")
+        self.text.setPlainText("\n".join(lines))
+
+class ExportDialog(QtWidgets.QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(config.APPLICATION_TITLE + " Export")
+        self.export_thread = None
+        today = QtCore.QDate.currentDate()
+        self.since_edit = QtWidgets.QDateEdit(today)
+        self.since_edit.setCalendarPopup(True)
+        self.until_edit = QtWidgets.QDateEdit(today)
+        self.until_edit.setCalendarPopup(True)
+        self.format_combo = QtWidgets.QComboBox()
+        self.format_combo.addItems(config.EXPORT_PRESETS.keys())
+        self.format_combo.setCurrentText(config.DEFAULT_EXPORT_PRESET)
+        self.samplerate_combo = QtWidgets.QComboBox()
+        self.samplerate_combo.addItem("Keep sample rate", None)
+        for samplerate in config.EXPORT_SAMPLERATES:
+            self.samplerate_combo.addItem(f"{samplerate} Hz", samplerate)
+        self.channels_combo = QtWidgets.QComboBox()
+        self.channels_combo.addItems(config.EXPORT_CHANNEL_LABELS.keys())
+        self.destination_edit = QtWidgets.QLineEdit(config.EXPORT_DESTINATION_PATH)
+        self.browse_button = QtWidgets.QPushButton("Browse...")
+        self.browse_button.clicked.connect(self.choose_destination)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        self.status_label = QtWidgets.QLabel()
+        self.export_button = QtWidgets.QPushButton("Export")
+        self.export_button.clicked.connect(self.start_export)
+        self.cancel_button = QtWidgets.QPushButton("Close")
+        self.cancel_button.clicked.connect(self.reject)
+
+        destination_layout = QHBoxLayout()
+        destination_layout.addWidget(self.destination_edit)
+        destination_layout.addWidget(self.browse_button)
+        form = QtWidgets.QFormLayout()
+        form.addRow("From", self.since_edit)
+        form.addRow("To", self.until_edit)
+        form.addRow("Format", self.format_combo)
+        form.addRow("Sample rate", self.samplerate_combo)
+        form.addRow("Channels", self.channels_combo)
+        form.addRow("Destination", destination_layout)
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(self.export_button)
+        buttons_layout.addWidget(self.cancel_button)
+        layout = QVBoxLayout()
+        layout.addLayout(form)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+        layout.addLayout(buttons_layout)
+        self.setLayout(layout)
+
+    def choose_destination(self):
+        path = QtWidgets.QFileDialog.getExistingDirectory(self, "Export to", self.destination_edit.text())
+        if path:
+            self.destination_edit.setText(path)
+
+    def start_export(self):
+        from .audio_tools import ExportThread
+        since = datetime.combine(self.since_edit.date().toPyDate(), datetime.min.time())
+        until = datetime.combine(self.until_edit.date().toPyDate(), datetime.min.time()) + timedelta(days=1)
+        self.export_thread = ExportThread(self.destination_edit.text(), since, until, self.format_combo.currentText(),
+                                          samplerate=self.samplerate_combo.currentData(),
+                                          channels=config.EXPORT_CHANNEL_LABELS[self.channels_combo.currentText()])
+        self.export_thread.progress_signal.connect(self.on_progress)
+        self.export_thread.finished.connect(self.on_export_finished)
+        self.export_button.setEnabled(False)
+        self.cancel_button.setText("Cancel")
+        self.progress_bar.setValue(0)
+        self.status_label.setText("Preparing...")
+        self.export_thread.start()
+
+    def on_progress(self, completed, count, done_seconds, total_seconds, result):
+        self.progress_bar.setMaximum(count)
+        self.progress_bar.setValue(completed)
+        self.progress_bar.setFormat(f"{completed} / {count}")
+        self.status_label.setText(os.path.basename(result.destination_path))
+
+    def on_export_finished(self):
+        thread = self.export_thread
+        self.export_button.setEnabled(True)
+        self.cancel_button.setText("Close")
+        if thread.error is not None:
+            self.status_label.setText(f"Export failed: {thread.error}")
+            return
+        exported = [result for result in thread.results if result.error is None]
+        failed = [result for result in thread.results if result.error not in (None, "cancelled")]
+        text = f"Exported {len(exported)} of {len(thread.jobs)} recordings"
+        if thread.is_cancelled:
+            text += " (cancelled)"
+        if failed:
+            text += f", {len(failed)} failed: {failed[0].error}"
+        self.status_label.setText(text)
+
+    def cancel_export(self):
+        if self.export_thread and self.export_thread.isRunning():
+            self.export_thread.cancel()
+            self.status_label.setText("Cancelling...")
+            return True
+        return False
+
+    def reject(self):
+        if not self.cancel_export():
+            super().reject()
+
+class LibraryLoader(QtCore.QThread):
+    page_loaded = QtCore.pyqtSignal(int, int, object)
+    count_loaded = QtCore.pyqtSignal(int, int)
+
+    def __init__(self):
+        super().__init__()
+        self.generation = 0
+        self._requests = queue.LifoQueue()
+
+    def request_count(self, generation, query):
+        self.generation = generation
+        self._requests.put((generation, query, None, None, 0))
+
+    def request_page(self, generation, query, page, cursor, offset):
+        self._requests.put((generation, query, page, cursor, offset))
+
+    def run(self):
+        from sqlalchemy.exc import SQLAlchemyError
+        from .models import Session
+        session = Session()
+        try:
+            while True:
+                request = self._requests.get()
+                if request is None:
+                    break
+                generation, query, page, cursor, offset = request
+                if generation != self.generation:
+                    continue
+                try:
+                    if page is None:
+                        self.count_loaded.emit(generation, query.count(session))
+                    else:
+                        self.page_loaded.emit(generation, page, query.page(session, cursor, offset))
+                except SQLAlchemyError:
+                    session.rollback()
+                else:
+                    session.commit()
+        finally:
+            session.close()
+
+    def stop(self):
+        self._requests.put(None)
+        self.wait()
+
+class LibraryModel(QtCore.QAbstractTableModel):
+    columns = (("Created", "created_at"), ("Name", "file_name"), ("Duration", "duration"), ("Size", "size_bytes"),
+               ("Profile", "profile"), ("Loudness", "loudness"), ("Clipped", "clipped_samples"),
+               ("Silence", "silence_ratio"))
+
+    def __init__(self, loader, page_size=config.LIBRARY_PAGE_SIZE, cache_pages=config.LIBRARY_CACHE_PAGES):
+        super().__init__()
+        self.loader = loader
+        self.page_size = page_size
+        self.cache_pages = cache_pages
+        self.query = LibraryQuery()
+        self.generation = 0
+        self.total = 0
+        self._pages = OrderedDict()
+        self._cursors = {0: None}
+        self._requested = set()
+        self.loader.page_loaded.connect(self.on_page_loaded)
+        self.loader.count_loaded.connect(self.on_count_loaded)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.total
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.columns[section][0]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role not in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole) or not index.isValid():
+            return None
+        row = self.row_at(index.row())
+        if row is None:
+            return "..." if index.column() == 0 else None
+        if role == QtCore.Qt.ToolTipRole:
+            return row.file_path
+        value = getattr(row, self.columns[index.column()][1])
+        if value is None:
+            return ""
+        if index.column() == 0:
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        if index.column() == 2:
+            return str(timedelta(seconds=round(value)))
+        if index.column() == 3:
+            return f"{value / 1024 ** 2:.1f} MiB"
+        if index.column() == 5:
+            return f"{value:.1f} LUFS"
+        if index.column() == 7:
+            return f"{value:.0%}"
+        return value
+
+    def row_at(self, position):
+        page, offset = divmod(position, self.page_size)
+        rows = self._pages.get(page)
+        if rows is None:
+            self._request_page(page)
+            return None
+        self._pages.move_to_end(page)
+        return rows[offset] if offset < len(rows) else None
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        sort = self.columns[column][1]
+        if sort not in LIBRARY_SORT_COLUMNS:
+            return
+        self.set_query(sort=sort, descending=order == QtCore.Qt.DescendingOrder)
+
+    def set_query(self, **changes):
+        for key, value in changes.items():
+            setattr(self.query, key, value)
+        self.refresh()
+
+    def refresh(self):
+        self.query = LibraryQuery(self.query.sort, self.query.descending, self.query.name, self.query.since,
+                                  self.query.until)
+        self.generation += 1
+        self.beginResetModel()
+        self.total = 0
+        self._pages.clear()
+        self._cursors = {0: None}
+        self._requested.clear()
+        self.endResetModel()
+        self.loader.request_count(self.generation, self.query)
+
+    def _request_page(self, page):
+        if page in self._requested:
+            return
+        self._requested.add(page)
+        known = max(known for known in self._cursors if known <= page)
+        self.loader.request_page(self.generation, self.query, page, self._cursors[known],
+                                 (page - known) * self.page_size)
+
+    def on_count_loaded(self, generation, total):
+        if generation != self.generation:
+            return
+        self.beginResetModel()
+        self.total = total
+        self.endResetModel()
+
+    def on_page_loaded(self, generation, page, rows):
+        if generation != self.generation:
+            return
+        self._requested.discard(page)
+        self._pages[page] = rows
+        while len(self._pages) > self.cache_pages:
+            self._pages.popitem(last=False)
+        first = page * self.page_size
+        if rows:
+            self._cursors[page + 1] = LibraryQuery.cursor(rows[-1])
+        if len(rows) < self.page_size and first + len(rows) < self.total:
+            self.beginRemoveRows(QtCore.QModelIndex(), first + len(rows), self.total - 1)
+            self.total = first + len(rows)
+            self.endRemoveRows()
+        if rows:
+            self.dataChanged.emit(self.index(first, 0), self.index(first + len(rows) - 1, len(self.columns) - 1))
+
+class LibraryPanel(QWidget):
+    recording_activated = QtCore.pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle(config.APPLICATION_TITLE + " Library")
+        self.resize(720, 480)
+        self.loader = LibraryLoader()
+        self.loader.start()
+        self.model = LibraryModel(self.loader)
+        self.name_edit = QtWidgets.QLineEdit()
+        self.name_edit.setPlaceholderText("Filter by name")
+        self.name_edit.setClearButtonEnabled(True)
+        self.date_check = QtWidgets.QCheckBox("From")
+        today = QtCore.QDate.currentDate()
+        self.since_edit = QtWidgets.QDateEdit(today)
+        self.since_edit.setCalendarPopup(True)
+        self.until_edit = QtWidgets.QDateEdit(today)
+        self.until_edit.setCalendarPopup(True)
+        self.count_label = QtWidgets.QLabel()
+        self.view = QtWidgets.QTableView()
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.view.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.view.verticalHeader().setDefaultSectionSize(self.view.fontMetrics().height() + 6)
+        self.view.verticalHeader().hide()
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.setSortingEnabled(True)
+        self.view.sortByColumn(0, QtCore.Qt.DescendingOrder)
+        self.view.doubleClicked.connect(self.on_double_clicked)
+        self.filter_timer = QtCore.QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(config.LIBRARY_FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(self.apply_filters)
+        self.name_edit.textChanged.connect(self.filter_timer.start)
+        self.date_check.toggled.connect(self.apply_filters)
+        self.since_edit.dateChanged.connect(self.apply_filters)
+        self.until_edit.dateChanged.connect(self.apply_filters)
+        self.model.modelReset.connect(self.update_count)
+        self.model.rowsRemoved.connect(self.update_count)
+
+        filters_layout = QHBoxLayout()
+        filters_layout.addWidget(self.name_edit)
+        filters_layout.addWidget(self.date_check)
+        filters_layout.addWidget(self.since_edit)
+        filters_layout.addWidget(QtWidgets.QLabel("to"))
+        filters_layout.addWidget(self.until_edit)
+        layout = QVBoxLayout()
+        layout.addLayout(filters_layout)
+        layout.addWidget(self.view)
+        layout.addWidget(self.count_label)
+        self.setLayout(layout)
+
+    def apply_filters(self):
+        since = until = None
+        if self.date_check.isChecked():
+            since = datetime.combine(self.since_edit.date().toPyDate(), datetime.min.time())
+            until = datetime.combine(self.until_edit.date().toPyDate(), datetime.min.time()) + timedelta(days=1)
+        self.model.set_query(name=self.name_edit.text().strip() or None, since=since, until=until)
+
+    def update_count(self):
+        self.count_label.setText(f"{self.model.total} recordings")
+
+    def on_double_clicked(self, index):
+        row = self.model.row_at(index.row())
+        if row is not None:
+            self.recording_activated.emit(entry_from_record(row))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.model.generation:
+            self.model.refresh()
+
+    def stop(self):
+        self.loader.stop()
+
 class MainWindow(QMainWindow):
+    recording_inserted = QtCore.pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle(config.APPLICATION_TITLE)
         self.resize(*config.APPLICATION_SIZE)
         self.setMaximumSize(QtCore.QSize(*config.APPLICATION_SIZE))
-        self._audio_processor = AudioProcessor(self.on_playing)
-        self._keyboard_controller = KeyInputController(self.on_key_press)
-        self._keyboard_controller.start()
+        self._audio_processor = None
+        self._hotkeys = None
+        self._persistence = None
+        self._scanner_thread = None
+        self._metrics_exporter = None
+        self._metrics_panel = None
+        self._export_dialog = None
+        self._library_panel = None
+        self._analysis = None
+        self._scan_timer = QtCore.QTimer(self)
+        self._first_paint = True
         self._create_widgets()
         self._initialize_icons()
         self._apply_button_styles()
         self._create_layouts()
         self._define_buttons_handlers()
+        self._set_controls_enabled(False)
+        self.waveform_viewer.display_text("Loading...")
+        self.current_recording = None
+        self._recording_profile = None
+        self._pending_peaks_path = None
+        self._recording_started_at = None
+        self._selected_devices = []
+        self.recording_index = RecordingIndex()
+        self._startup_worker = StartupWorker()
+        self._startup_worker.modules_ready.connect(self.on_modules_ready)
+        self._startup_worker.library_ready.connect(self.on_library_ready)
+        self._startup_worker.recovery_finished.connect(self.on_recovery_finished)
+        QtWidgets.QShortcut(QtGui.QKeySequence(config.METRICS_PANEL_SHORTCUT), self, self.toggle_metrics_panel)
+        QtWidgets.QShortcut(QtGui.QKeySequence(config.LIBRARY_PANEL_SHORTCUT), self, self.toggle_library_panel)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._startup_worker.isRunning() and not self._startup_worker.isFinished():
+            profiler.mark("window shown")
+            self._startup_worker.start()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._first_paint:
+            self._first_paint = False
+            profiler.mark("first paint")
+
+    def on_modules_ready(self):
+        from .audio_tools import AudioProcessor
+        from .persistence import PersistenceWorker
+        self.waveform_viewer.create_canvas()
+        self._audio_processor = AudioProcessor(self.on_playing)
+        self._hotkeys = HotkeyService()
+        self._hotkeys.action_triggered.connect(self.on_hotkey, QtCore.Qt.QueuedConnection)
+        self._hotkeys.start()
+        self._persistence = PersistenceWorker(on_inserted=self.recording_inserted.emit)
+        self._persistence.start()
+        self._metrics_exporter = start_exporter()
         self._define_thread_signals()
+        self._set_controls_enabled(True)
+        self.waveform_viewer.reset_layout()
         self.waveform_viewer.display_text()
-        self.current_recording = None
+        profiler.mark("controls ready")
+
+    def on_library_ready(self, recording_index, error):
+        for position in range(len(self.recording_index)):
+            recording_index.add(self.recording_index.entry_at(position))
+        self.recording_index = recording_index
+        if error is not None:
+            self.setWindowTitle(config.APPLICATION_TITLE + " Database Unavailable")
+        else:
+            self._start_scanner()
+            self._start_analysis()
+        profiler.mark("library ready")
+        profiler.report()
+
+    def on_recovery_finished(self, recovered):
+        from .recovery import submit_recovered
+        submit_recovered(self._persistence, recovered)
+        for file_path, (info, _) in recovered.items():
+            entry = self.recording_index.get(file_path)
+            if entry:
+                self.recording_index.update(entry._replace(duration=info["duration"]))
+        self.waveform_viewer.display_text(f"Recovered {len(recovered)} interrupted recordings")
+
+    def _start_scanner(self):
+        from .scanner import ReconciliationScanner
+        self._scanner_thread = ScannerThread(ReconciliationScanner(self._persistence.submit))
+        self._scanner_thread.scan_finished.connect(self.on_scan_finished)
+        self._scanner_thread.start()
+        self._scan_timer.timeout.connect(self._run_scan)
+        self._scan_timer.start(config.SCAN_INTERVAL_SECONDS * 1000)
+
+    def _start_analysis(self):
+        from .analysis import AnalysisService
+        self._analysis = AnalysisService(is_busy=self._is_audio_busy)
+        self._analysis.start()
+
+    def _is_audio_busy(self):
+        return bool(self._audio_processor and (self._audio_processor.is_recording or self._audio_processor.is_playing))
+
+    def _run_scan(self):
+        if not self._scanner_thread.isRunning():
+            self._scanner_thread.start()
+
+    def on_scan_finished(self, result):
+        for file_path in result.missing:
+            self.recording_index.remove(file_path)
+        for entry in result.restored:
+            self.recording_index.add(entry)
+
+    def _populate_devices_menu(self):
+        self.devices_menu.clear()
+        for device_name in self._audio_processor.input_devices():
+            action = self.devices_menu.addAction(device_name)
+            action.setCheckable(True)
+            action.setChecked(device_name in self._selected_devices)
+            action.toggled.connect(lambda checked, name=device_name: self._select_device(name, checked))
+
+    def _select_device(self, device_name, selected):
+        if selected and device_name not in self._selected_devices:
+            self._selected_devices.append(device_name)
+        elif not selected and device_name in self._selected_devices:
+            self._selected_devices.remove(device_name)
+
+    def toggle_metrics_panel(self):
+        if self._metrics_panel is None:
+            self._metrics_panel = MetricsPanel()
+        self._metrics_panel.setVisible(not self._metrics_panel.isVisible())
+
+    def toggle_library_panel(self):
+        if self._library_panel is None:
+            self._library_panel = LibraryPanel()
+            self._library_panel.recording_activated.connect(self.on_library_recording_activated)
+        self._library_panel.setVisible(not self._library_panel.isVisible())
+
+    def on_library_recording_activated(self, entry):
+        self.current_recording = self.recording_index.get(entry.file_path) or entry
+        self.play_audio(self.current_recording)
+
+    def open_export_dialog(self):
+        if self._export_dialog is None:
+            self._export_dialog = ExportDialog(self)
+        self._export_dialog.show()
+        self._export_dialog.raise_()
+
+    def _set_controls_enabled(self, enabled):
+        self.play_button.setEnabled(enabled)
+        self.play_next_button.setEnabled(enabled)
+        self.play_prev_button.setEnabled(enabled)
+        self.start_record_button.setEnabled(enabled)
+        self.profile_combo.setEnabled(enabled)
+        self.vad_combo.setEnabled(enabled)
+        self.devices_button.setEnabled(enabled)
+        self.export_button.setEnabled(enabled)
+        self.library_button.setEnabled(enabled)
 
     def _define_thread_signals(self):
         self._audio_processor.playing_finished.connect(self.on_playing_finished)
         self._audio_processor.recording_finished.connect(self.on_recording_finished)
+        self._audio_processor.recording_levels.connect(self.waveform_viewer.update_levels)
+        self._audio_processor.recording_segment.connect(self.on_recording_segment)
+        self._audio_processor.peaks_ready.connect(self.on_peaks_ready)
+        self.recording_inserted.connect(self.on_recording_inserted)
+        self.waveform_viewer.seek_requested.connect(self.on_seek_requested)
 
     def _define_buttons_handlers(self):
         self.play_button.clicked.connect(self.play_button_click)
@@ -77,6 +989,8 @@ class MainWindow(QMainWindow):
         self.play_prev_button.clicked.connect(self.play_prev_audio_button_click)
         self.start_record_button.clicked.connect(self.start_record_button_click)
         self.stop_record_button.clicked.connect(self.stop_record_button_click)
+        self.export_button.clicked.connect(self.open_export_dialog)
+        self.library_button.clicked.connect(self.toggle_library_panel)
         self.stop_record_button.setEnabled(False)
 
     def _create_layouts(self):
@@ -84,6 +998,12 @@ class MainWindow(QMainWindow):
         self.buttons_layout = QHBoxLayout()
         self.buttons_layout.addWidget(self.stop_record_button)
         self.buttons_layout.addWidget(self.start_record_button)
+        self.buttons_layout.addWidget(self.profile_combo)
+        self.buttons_layout.addWidget(self.vad_combo)
+        self.buttons_layout.addWidget(self.devices_button)
+        self.buttons_layout.addWidget(self.library_button)
+        self.buttons_layout.addWidget(self.export_button)
+        self.buttons_layout.addStretch()
         self.buttons_layout.addWidget(self.play_prev_button)
         self.buttons_layout.addWidget(self.play_button)
         self.buttons_layout.addWidget(self.play_next_button)
@@ -106,6 +1026,19 @@ class MainWindow(QMainWindow):
         self.play_prev_button.setGeometry(QtCore.QRect(505, 290, 75, 24))
         self.play_button.setGeometry(QtCore.QRect(580, 290, 75, 24))
         self.play_next_button.setGeometry(QtCore.QRect(660, 290, 75, 24))
+        self.profile_combo = QtWidgets.QComboBox(self)
+        self.profile_combo.addItems(config.RECORDING_PROFILES.keys())
+        self.profile_combo.setCurrentText(config.DEFAULT_RECORDING_PROFILE)
+        self.vad_combo = QtWidgets.QComboBox(self)
+        self.vad_combo.addItems(config.VAD_MODE_LABELS.keys())
+        self.devices_button = QtWidgets.QToolButton(self)
+        self.devices_button.setText("Inputs")
+        self.devices_button.setPopupMode(QtWidgets.QToolButton.InstantPopup)
+        self.devices_menu = QtWidgets.QMenu(self.devices_button)
+        self.devices_menu.aboutToShow.connect(self._populate_devices_menu)
+        self.devices_button.setMenu(self.devices_menu)
+        self.export_button = QtWidgets.QPushButton("Export", self)
+        self.library_button = QtWidgets.QPushButton("Library", self)
         self.play_button.setFixedSize(40,40)
         self.play_next_button.setFixedSize(40,40)
         self.play_prev_button.setFixedSize(40,40)
@@ -116,6 +1049,11 @@ class MainWindow(QMainWindow):
         self.play_prev_button.setToolTip("Play the previous recorded audio")
         self.start_record_button.setToolTip("Start recording audio")
         self.stop_record_button.setToolTip("Stop recording audio")
+        self.profile_combo.setToolTip("Recording profile")
+        self.vad_combo.setToolTip("Drop silences or split the recording into one file per utterance")
+        self.devices_button.setToolTip("Input devices to record from at the same time (default input if none)")
+        self.export_button.setToolTip("Export or transcode all recordings from a date range")
+        self.library_button.setToolTip("Browse, sort and filter all recordings (Ctrl+L)")
 
     def _initialize_icons(self):
         self._main_icon = QtGui.QIcon()
@@ -185,14 +1123,23 @@ class MainWindow(QMainWindow):
         self.play_button.setEnabled(True)
         self.start_record_button.setEnabled(True)
         self.stop_record_button.setEnabled(False)
+        self.profile_combo.setEnabled(True)
+        self.vad_combo.setEnabled(True)
+        self.devices_button.setEnabled(True)
 
     def play_button_click(self):
         if self._audio_processor.is_playing:
-            self._audio_processor.stop_palying()
-            self.reset_buttons()
+            if self._audio_processor.is_paused:
+                self._audio_processor.resume_playing()
+                self.play_button.setIcon(self._pause_icon)
+                self.start_record_button.setEnabled(False)
+            else:
+                self._audio_processor.pause_playing()
+                self.play_button.setIcon(self._play_icon)
+                self.start_record_button.setEnabled(True)
         else:
             if not self.current_recording:
-                self.current_recording = session.query(RecordingFile).order_by(RecordingFile.id.desc()).first()
+                self.current_recording = self.recording_index.latest()
             if self.current_recording:
                 self.play_audio(self.current_recording)
 
@@ -207,30 +1154,66 @@ class MainWindow(QMainWindow):
         if audio_file_record:
             if os.path.exists(audio_file_record.file_path):
                 self.setWindowTitle(config.APPLICATION_TITLE + f" {audio_file_record.file_name}")
+                if audio_file_record.duration:
+                    self.waveform_viewer.update_timer_bar(0, audio_file_record.duration)
                 self._audio_processor.start_playing(audio_file_record.file_path)
-                waveform_data = self._audio_processor.playing_thread.audio_data
-                self.waveform_viewer.update_waveform(waveform_data)  
+                peaks = self._audio_processor.load_peaks(audio_file_record.file_path)
+                if peaks is None:
+                    self._pending_peaks_path = audio_file_record.file_path
+                    self.waveform_viewer.show_pending("Building waveform...")
+                else:
+                    self._pending_peaks_path = None
+                    self.waveform_viewer.update_waveform(peaks, audio_file_record.file_path)
+                self.prefetch_neighbours(audio_file_record)
             else:
                 self.setWindowTitle(config.APPLICATION_TITLE + f" File Not Found!")
+                self._persistence.update(audio_file_record.file_path, missing=True)
                 self.waveform_viewer.reset_layout()
                 self.waveform_viewer.display_text(f"File {audio_file_record.file_name} Not Found!")
         else:
             self.reset_buttons()
 
+    def on_peaks_ready(self, file_path, peaks):
+        if file_path != self._pending_peaks_path:
+            return
+        self._pending_peaks_path = None
+        if peaks is None:
+            self.waveform_viewer.show_pending("Waveform unavailable")
+        else:
+            self.waveform_viewer.update_waveform(peaks, file_path)
+
+    def prefetch_neighbours(self, audio_file_record):
+        neighbours = [self.recording_index.prev(audio_file_record), self.recording_index.next(audio_file_record)]
+        self._audio_processor.prefetch([entry.file_path for entry in neighbours if entry])
+
     def start_record_button_click(self):
+        if self._audio_processor.is_playing:
+            self._audio_processor.stop_palying()
         self.setWindowTitle(config.APPLICATION_TITLE + " Redording...")
+        self._pending_peaks_path = None
         self.waveform_viewer.reset_layout()
-        self.waveform_viewer.display_text("Recording...")
-        file_name = utils.create_new_audio_file_name()
+        self.waveform_viewer.start_live()
+        profile_name = self.profile_combo.currentText()
+        vad = config.VAD_MODE_LABELS[self.vad_combo.currentText()]
+        file_name = utils.create_new_audio_file_name(profile_name)
         file_path = utils.get_audio_file_path(file_name)
-        recording_file = RecordingFile(file_name=file_name, file_path=file_path)
-        session.add(recording_file)
-        session.commit()
-        self.current_recording = recording_file
-        self._audio_processor.start_recording(file_path)
+        self._recording_profile = profile_name
+        self._recording_started_at = datetime.now()
+        self._audio_processor.start_recording(file_path, profile_name, vad, self._selected_devices or None)
+        self.current_recording = None
+        for recording_path, fields in self._audio_processor.recording_thread.recordings():
+            recording_name = os.path.basename(recording_path)
+            self._persistence.insert(file_name=recording_name, file_path=recording_path, profile=profile_name,
+                                     created_at=self._recording_started_at, **fields)
+            entry = RecordingEntry(None, recording_name, recording_path, None)
+            self.recording_index.add(entry)
+            self.current_recording = self.current_recording or entry
         self.play_button.setEnabled(False)
         self.start_record_button.setEnabled(False)
         self.stop_record_button.setEnabled(True)
+        self.profile_combo.setEnabled(False)
+        self.vad_combo.setEnabled(False)
+        self.devices_button.setEnabled(False)
         
     def stop_record_button_click(self):
         self._audio_processor.stop_recording()
@@ -239,7 +1222,57 @@ class MainWindow(QMainWindow):
         self._audio_processor.stop_recording()
         self.setWindowTitle(config.APPLICATION_TITLE)
         self.reset_layout()
-        self.waveform_viewer.display_text(f"Last Recording: {self.current_recording.file_name}")
+        recording_thread = self._audio_processor.recording_thread
+        for recording_path, info in recording_thread.results():
+            self._persistence.update(recording_path, **info)
+            entry = self.recording_index.get(recording_path)
+            if entry:
+                entry = entry._replace(duration=info["duration"])
+                self.recording_index.update(entry)
+                if self.current_recording and self.current_recording.file_path == recording_path:
+                    self.current_recording = entry
+        for recording_path, parts in recording_thread.parts.items():
+            self._persistence.insert_segments(recording_path, parts)
+        if self._analysis:
+            self._analysis.wake()
+        recordings = recording_thread.recordings()
+        if not recordings:
+            text = f"Recorded {len(recording_thread.segments)} segments"
+        elif len(recordings) > 1:
+            text = f"Recorded {len(recordings)} devices"
+        else:
+            text = f"Last Recording: {self.current_recording.file_name}"
+        for device_name, error in recording_thread.errors.items():
+            text += f"\n{device_name} failed: {error}"
+        stats = recording_thread.stats
+        if stats["xruns"] or stats["dropped_frames"]:
+            text += f"\n{stats['xruns']} xruns, {stats['dropped_frames']} dropped frames"
+        self.waveform_viewer.display_text(text)
+
+    def on_recording_segment(self, file_path, start_offset, info):
+        file_name = os.path.basename(file_path)
+        self._persistence.insert(file_name=file_name, file_path=file_path, profile=self._recording_profile,
+                                 created_at=self._recording_started_at + timedelta(seconds=start_offset), **info)
+        self.current_recording = RecordingEntry(None, file_name, file_path, info["duration"])
+        self.recording_index.add(self.current_recording)
+
+    def on_recording_inserted(self, entry):
+        existing = self.recording_index.get(entry.file_path)
+        if existing:
+            entry = existing._replace(id=entry.id)
+            self.recording_index.update(entry)
+        else:
+            self.recording_index.add(entry)
+        if self.current_recording and self.current_recording.file_path == entry.file_path:
+            self.current_recording = entry
+
+    def on_seek_requested(self, seconds):
+        if self._audio_processor.is_playing:
+            self._audio_processor.seek(seconds)
+        elif self.current_recording and self.play_button.isEnabled():
+            self._audio_processor.start_playing(self.current_recording.file_path, seconds)
+            self.play_button.setIcon(self._pause_icon)
+            self.start_record_button.setEnabled(False)
 
     def on_playing_finished(self):
         self._audio_processor.stop_palying()
@@ -247,16 +1280,16 @@ class MainWindow(QMainWindow):
 
     def on_playing(self, elapsed_time, duration):
         self.waveform_viewer.update_timer_bar(elapsed_time, duration)
+        self.waveform_viewer.update_playhead(elapsed_time)
 
     def navigate_audio(self, direction):
-        total_recordings = session.query(RecordingFile).count()
-        if total_recordings > 0:
+        if len(self.recording_index) > 0:
             if not self.current_recording:
-                self.current_recording = session.query(RecordingFile).order_by(RecordingFile.id.desc()).first()
+                self.current_recording = self.recording_index.latest()
             if direction == "prev":
-                self.current_recording = session.query(RecordingFile).filter(RecordingFile.id < self.current_recording.id).order_by(RecordingFile.id.desc()).first()
+                self.current_recording = self.recording_index.prev(self.current_recording)
             elif direction == "next": 
-                self.current_recording = session.query(RecordingFile).filter(RecordingFile.id > self.current_recording.id).order_by(RecordingFile.id.asc()).first()
+                self.current_recording = self.recording_index.next(self.current_recording)
         
         if self.current_recording:
             self.play_audio(self.current_recording)
@@ -267,11 +1300,40 @@ class MainWindow(QMainWindow):
     def play_prev_audio_button_click(self):
         self.navigate_audio("prev")
 
-    def on_key_press(self, key):
-        if key == keyboard.Key.page_up: 
+    def closeEvent(self, event):
+        if self._hotkeys:
+            self._hotkeys.stop()
+        self._scan_timer.stop()
+        if self._scanner_thread:
+            self._scanner_thread.wait()
+        if self._analysis:
+            self._analysis.stop()
+        if self._persistence:
+            self._persistence.stop()
+        if self._metrics_exporter:
+            self._metrics_exporter.stop()
+        if self._metrics_panel:
+            self._metrics_panel.close()
+        if self._library_panel:
+            self._library_panel.stop()
+            self._library_panel.close()
+        if self._export_dialog and self._export_dialog.cancel_export():
+            self._export_dialog.export_thread.wait()
+        super().closeEvent(event)
+
+    def on_hotkey(self, action):
+        if action == "prev":
             self.navigate_audio("prev")
-        elif key == keyboard.Key.page_down: 
+        elif action == "next":
             self.navigate_audio("next")
+        elif action == "play_pause":
+            if self.play_button.isEnabled():
+                self.play_button_click()
+        elif action == "toggle_record":
+            if self.stop_record_button.isEnabled():
+                self.stop_record_button_click()
+            elif self.start_record_button.isEnabled():
+                self.start_record_button_click()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
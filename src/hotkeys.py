@@ -0,0 +1,53 @@
+import time
+from PyQt5 import QtCore
+from . import config
+
+class HotkeyService(QtCore.QObject):
+    action_triggered = QtCore.pyqtSignal(str)
+
+    def __init__(self, bindings=config.HOTKEY_BINDINGS, debounce=config.HOTKEY_DEBOUNCE_SECONDS):
+        super().__init__()
+        self.bindings = bindings
+        self.debounce = debounce
+        self.is_running = False
+        self._listener = None
+        self._actions = {}
+        self._pressed = set()
+        self._last_triggered = {}
+
+    def start(self):
+        try:
+            from pynput import keyboard
+        except ImportError:
+            return False
+        self._actions = {self._parse_key(keyboard, name): action for name, action in self.bindings.items()}
+        self._listener = keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
+        self._listener.start()
+        self.is_running = True
+        return True
+
+    @staticmethod
+    def _parse_key(keyboard, name):
+        if hasattr(keyboard.Key, name):
+            return getattr(keyboard.Key, name)
+        return keyboard.KeyCode.from_char(name)
+
+    def _on_press(self, key):
+        action = self._actions.get(key)
+        if action is None or key in self._pressed:
+            return
+        self._pressed.add(key)
+        now = time.monotonic()
+        if now - self._last_triggered.get(action, 0.0) < self.debounce:
+            return
+        self._last_triggered[action] = now
+        self.action_triggered.emit(action)
+
+    def _on_release(self, key):
+        self._pressed.discard(key)
+
+    def stop(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+        self.is_running = False
@@ -0,0 +1,22 @@
+from collections import namedtuple
+import numpy as np
+
+Levels = namedtuple("Levels", ["elapsed", "peak", "rms", "mins", "maxs"])
+
+class LevelMonitor:
+    def __init__(self, samplerate, channels, column_seconds):
+        self.samplerate = samplerate
+        self.column_frames = max(1, int(samplerate * column_seconds))
+        self.frames = 0
+        self._pending = np.zeros((0, channels), dtype='float32')
+
+    def add(self, data):
+        self.frames += len(data)
+        peak = np.abs(data).max(axis=0) if len(data) else np.zeros(data.shape[1], dtype='float32')
+        rms = np.sqrt(np.square(data).mean(axis=0)) if len(data) else peak
+        if len(self._pending):
+            data = np.concatenate([self._pending, data])
+        full = len(data) // self.column_frames * self.column_frames
+        columns = data[:full].reshape(-1, self.column_frames * data.shape[1])
+        self._pending = data[full:].copy()
+        return Levels(self.frames / self.samplerate, peak, rms, columns.min(axis=1), columns.max(axis=1))
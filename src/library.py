@@ -0,0 +1,150 @@
+from bisect import bisect_left
+from collections import namedtuple
+from . import config
+
+RecordingEntry = namedtuple("RecordingEntry", ["id", "file_name", "file_path", "duration"])
+
+def entry_from_record(record):
+    return RecordingEntry(record.id, record.file_name, record.file_path, record.duration)
+
+class RecordingIndex:
+    def __init__(self):
+        self._entries = []
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self, session, page_size=config.RECORDING_INDEX_PAGE_SIZE):
+        from .models import RecordingFile
+        entries = []
+        last_id = None
+        while True:
+            query = session.query(RecordingFile.id, RecordingFile.file_name, RecordingFile.file_path, RecordingFile.duration)
+            query = query.filter(RecordingFile.missing.isnot(True))
+            if last_id is not None:
+                query = query.filter(RecordingFile.id > last_id)
+            page = query.order_by(RecordingFile.id).limit(page_size).all()
+            entries.extend(RecordingEntry(*row) for row in page)
+            if len(page) < page_size:
+                break
+            last_id = page[-1].id
+        self._entries = entries
+        self._reindex(0)
+
+    def _reindex(self, start):
+        for position in range(start, len(self._entries)):
+            self._positions[self._entries[position].file_path] = position
+
+    def entry_at(self, position):
+        return self._entries[position]
+
+    def latest(self):
+        return self._entries[-1] if self._entries else None
+
+    def get(self, file_path):
+        position = self._positions.get(file_path)
+        return self._entries[position] if position is not None else None
+
+    def neighbour(self, entry, offset):
+        position = self._positions.get(entry.file_path)
+        if position is None:
+            return None
+        position += offset
+        if 0 <= position < len(self._entries):
+            return self._entries[position]
+        return None
+
+    def next(self, entry):
+        return self.neighbour(entry, 1)
+
+    def prev(self, entry):
+        return self.neighbour(entry, -1)
+
+    def add(self, entry):
+        if entry.file_path in self._positions:
+            self.update(entry)
+            return
+        last = self.latest()
+        if entry.id is None or last is None or last.id is None or entry.id > last.id:
+            self._entries.append(entry)
+            self._positions[entry.file_path] = len(self._entries) - 1
+        else:
+            position = bisect_left([item.id for item in self._entries], entry.id)
+            self._entries.insert(position, entry)
+            self._reindex(position)
+
+    def update(self, entry):
+        position = self._positions.get(entry.file_path)
+        if position is not None:
+            self._entries[position] = entry
+
+    def remove(self, file_path):
+        position = self._positions.pop(file_path, None)
+        if position is not None:
+            del self._entries[position]
+            self._reindex(position)
+
+LIBRARY_SORT_COLUMNS = ("created_at", "file_name", "duration", "size_bytes", "loudness", "silence_ratio")
+
+class LibraryQuery:
+    def __init__(self, sort="created_at", descending=True, name=None, since=None, until=None):
+        self.sort = sort
+        self.descending = descending
+        self.name = name
+        self.since = since
+        self.until = until
+
+    def _sort_column(self):
+        from sqlalchemy import func
+        from .models import RecordingAnalysis, RecordingFile
+        if self.sort in ("loudness", "silence_ratio"):
+            return func.coalesce(getattr(RecordingAnalysis, self.sort), -1000 if self.sort == "loudness" else -1)
+        column = getattr(RecordingFile, self.sort)
+        if self.sort in ("duration", "size_bytes"):
+            return func.coalesce(column, -1)
+        return column
+
+    def _filter(self, query):
+        from .models import RecordingFile
+        query = query.filter(RecordingFile.missing.isnot(True))
+        if self.sort == "created_at":
+            query = query.filter(RecordingFile.created_at.isnot(None))
+        if self.name:
+            pattern = self.name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = query.filter(RecordingFile.file_name.ilike(f"%{pattern}%", escape="\\"))
+        if self.since:
+            query = query.filter(RecordingFile.created_at >= self.since)
+        if self.until:
+            query = query.filter(RecordingFile.created_at < self.until)
+        return query
+
+    def count(self, session):
+        from sqlalchemy import func
+        from .models import RecordingFile
+        return self._filter(session.query(func.count(RecordingFile.id))).scalar()
+
+    def page(self, session, cursor=None, offset=0, limit=config.LIBRARY_PAGE_SIZE):
+        from sqlalchemy import and_, or_
+        from .models import RecordingAnalysis, RecordingFile
+        column = self._sort_column()
+        query = session.query(RecordingFile.id, RecordingFile.file_name, RecordingFile.file_path,
+                              RecordingFile.created_at, RecordingFile.duration, RecordingFile.size_bytes,
+                              RecordingFile.profile, RecordingAnalysis.loudness, RecordingAnalysis.clipped_samples,
+                              RecordingAnalysis.silence_ratio, column.label("sort_key"))
+        query = self._filter(query.outerjoin(RecordingAnalysis, RecordingAnalysis.recording_id == RecordingFile.id))
+        if cursor is not None:
+            value, row_id = cursor
+            if self.descending:
+                query = query.filter(or_(column < value, and_(column == value, RecordingFile.id < row_id)))
+            else:
+                query = query.filter(or_(column > value, and_(column == value, RecordingFile.id > row_id)))
+        if self.descending:
+            query = query.order_by(column.desc(), RecordingFile.id.desc())
+        else:
+            query = query.order_by(column, RecordingFile.id)
+        return query.offset(offset).limit(limit).all()
+
+    @staticmethod
+    def cursor(row):
+        return row.sort_key, row.id
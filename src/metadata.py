@@ -0,0 +1,21 @@
+import os
+import soundfile as sf
+from .peaks import load_peaks
+from .utils import get_part_paths
+
+METADATA_FIELDS = ("duration", "frames", "samplerate", "channels", "subtype", "size_bytes", "peak_level")
+
+def collect_metadata(file_path, peak_pyramid, channels, subtype):
+    return {
+        "duration": peak_pyramid.duration,
+        "frames": peak_pyramid.frames,
+        "samplerate": peak_pyramid.samplerate,
+        "channels": channels,
+        "subtype": subtype,
+        "size_bytes": sum(os.path.getsize(path) for path in get_part_paths(file_path)),
+        "peak_level": peak_pyramid.peak_level,
+    }
+
+def probe_audio_file(file_path):
+    info = sf.info(file_path)
+    return collect_metadata(file_path, load_peaks(file_path), info.channels, info.subtype)
@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import time
+from array import array
+from . import config
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=None):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        self.value = value
+
+# Single writer per histogram: observe() runs in audio callbacks, so it takes no lock and
+# only fills a preallocated window that readers copy and summarize off the audio thread.
+# Threads that would share a metric (one recorder per device) get their own labelled instance.
+class Histogram:
+    kind = "summary"
+    quantiles = (0.5, 0.95, 0.99)
+
+    def __init__(self, name, help, labels=None, size=config.METRICS_HISTOGRAM_SIZE):
+        self.name = name
+        self.help = help
+        self.labels = labels or {}
+        self.size = size
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._samples = array('d', bytes(8 * size))
+
+    def observe(self, value):
+        self._samples[self.count % self.size] = value
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+    def snapshot(self):
+        count = self.count
+        samples = sorted(self._samples[:min(count, self.size)])
+        result = {"count": count, "sum": self.sum, "max": self.max}
+        for quantile in self.quantiles:
+            result[f"p{int(quantile * 100)}"] = samples[min(len(samples) - 1, int(len(samples) * quantile))] if samples else 0.0
+        return result
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started_at)
+
+class MetricsRegistry:
+    def __init__(self, prefix="voice_recorder_"):
+        self.prefix = prefix
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help, labels):
+        key = name + format_labels(labels)
+        with self._lock:
+            if key not in self.metrics:
+                self.metrics[key] = cls(self.prefix + name, help, labels)
+            return self.metrics[key]
+
+    def counter(self, name, help="", labels=None):
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name, help="", labels=None):
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(self, name, help="", labels=None):
+        return self._register(Histogram, name, help, labels)
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self.metrics.items())
+        return {name: metric.snapshot() for name, metric in metrics}
+
+    def to_json(self):
+        return json.dumps({"timestamp": time.time(), "metrics": self.snapshot()}, indent=2)
+
+    def to_prometheus(self):
+        with self._lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        described = set()
+        for metric in sorted(metrics, key=lambda metric: metric.name):
+            if metric.name not in described:
+                described.add(metric.name)
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            value = metric.snapshot()
+            labels = format_labels(metric.labels)
+            if isinstance(metric, Histogram):
+                for quantile in metric.quantiles:
+                    quantile_labels = format_labels(dict(metric.labels, quantile=quantile))
+                    lines.append(f'{metric.name}{quantile_labels} {value[f"p{int(quantile * 100)}"]}')
+                lines.append(f"{metric.name}_sum{labels} {value['sum']}")
+                lines.append(f"{metric.name}_count{labels} {value['count']}")
+            else:
+                lines.append(f"{metric.name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+class MetricsExporter(threading.Thread):
+    def __init__(self, path, registry, interval=config.METRICS_EXPORT_INTERVAL):
+        super().__init__(daemon=True)
+        self.path = path
+        self.registry = registry
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.write()
+        self.write()
+
+    def write(self):
+        text = self.registry.to_json() if self.path.endswith(".json") else self.registry.to_prometheus()
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w") as file:
+                file.write(text)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
+
+    def stop(self, timeout=5):
+        self._stop_event.set()
+        self.join(timeout)
+
+registry = MetricsRegistry()
+
+def start_exporter(path=config.METRICS_EXPORT_PATH):
+    if not path:
+        return None
+    exporter = MetricsExporter(path, registry)
+    exporter.start()
+    return exporter
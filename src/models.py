@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime 
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, DateTime, Float, Boolean, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from src.config import DATABASE_URL
 from datetime import datetime
+import threading
 
 Base = declarative_base()
 
@@ -12,7 +13,69 @@ class RecordingFile(Base):
     id = Column(Integer, primary_key=True)
     file_name = Column(String, unique=True)
     file_path = Column(String, unique=True)
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+    profile = Column(String)
+    duration = Column(Float)
+    frames = Column(BigInteger)
+    samplerate = Column(Integer)
+    channels = Column(Integer)
+    subtype = Column(String)
+    size_bytes = Column(BigInteger)
+    peak_level = Column(Float)
+    missing = Column(Boolean, default=False)
+    session_id = Column(String(32), index=True)
+    device_name = Column(String)
+    start_offset = Column(Float)
 
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
+class RecordingSegment(Base):
+    __tablename__ = 'recording_segments'
+
+    id = Column(Integer, primary_key=True)
+    recording_id = Column(Integer, ForeignKey('recording_files.id', ondelete='CASCADE'), nullable=False, index=True)
+    sequence = Column(Integer, nullable=False)
+    file_path = Column(String, unique=True)
+    start_frame = Column(BigInteger)
+    frames = Column(BigInteger)
+    size_bytes = Column(BigInteger)
+
+class RecordingAnalysis(Base):
+    __tablename__ = 'recording_analysis'
+
+    id = Column(Integer, primary_key=True)
+    recording_id = Column(Integer, ForeignKey('recording_files.id', ondelete='CASCADE'), nullable=False, unique=True)
+    loudness = Column(Float)
+    peak_level = Column(Float)
+    clipped_samples = Column(BigInteger)
+    silence_ratio = Column(Float)
+    analyzed_at = Column(DateTime, default=datetime.now)
+
+class AnalysisJob(Base):
+    __tablename__ = 'analysis_jobs'
+
+    id = Column(Integer, primary_key=True)
+    recording_id = Column(Integer, ForeignKey('recording_files.id', ondelete='CASCADE'), nullable=False, unique=True)
+    status = Column(String(16), nullable=False, index=True)
+    attempts = Column(Integer, default=0)
+    error = Column(String)
+    queued_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime)
+    owner_host = Column(String)
+    owner_pid = Column(Integer)
+
+engine = None
+_session_factory = sessionmaker()
+_engine_lock = threading.Lock()
+
+def get_engine():
+    global engine
+    if engine is None:
+        with _engine_lock:
+            if engine is None:
+                new_engine = create_engine(DATABASE_URL)
+                _session_factory.configure(bind=new_engine)
+                engine = new_engine
+    return engine
+
+def Session(**kwargs):
+    get_engine()
+    return _session_factory(**kwargs)
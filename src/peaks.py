@@ -0,0 +1,148 @@
+import os
+import tempfile
+import threading
+import numpy as np
+from . import config
+from .reader import open_reader
+from .utils import get_part_paths
+
+
+class PeakPyramid:
+    def __init__(self, levels, block_size, factor, frames, samplerate):
+        self.levels = levels
+        self.block_size = block_size
+        self.factor = factor
+        self.frames = frames
+        self.samplerate = samplerate
+
+    @property
+    def duration(self):
+        return self.frames / self.samplerate if self.samplerate else 0.0
+
+    @property
+    def peak_level(self):
+        mins, maxs = self.levels[-1]
+        return float(max(abs(mins.min()), abs(maxs.max())))
+
+    def bucket_size(self, level):
+        return self.block_size * self.factor ** level
+
+    def envelope(self, width, start_frame=0, stop_frame=None):
+        if stop_frame is None:
+            stop_frame = self.frames
+        width = max(1, int(width))
+        span = max(1, stop_frame - start_frame)
+        level = 0
+        while level + 1 < len(self.levels) and span / self.bucket_size(level + 1) >= width:
+            level += 1
+        bucket = self.bucket_size(level)
+        mins, maxs = self.levels[level]
+        first = min(start_frame // bucket, len(mins))
+        last = min(-(-stop_frame // bucket), len(mins))
+        mins, maxs = mins[first:last], maxs[first:last]
+        if len(mins) <= width:
+            return mins, maxs
+        edges = np.linspace(0, len(mins), width, endpoint=False).astype(np.int64)
+        return np.minimum.reduceat(mins, edges), np.maximum.reduceat(maxs, edges)
+
+    def save(self, path):
+        arrays = {}
+        for level, (mins, maxs) in enumerate(self.levels):
+            arrays[f"min_{level}"] = mins
+            arrays[f"max_{level}"] = maxs
+        meta = np.array([self.block_size, self.factor, self.frames, self.samplerate, len(self.levels)], dtype=np.int64)
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".peaks.tmp")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                np.savez(file, meta=meta, **arrays)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            block_size, factor, frames, samplerate, count = (int(value) for value in data["meta"])
+            levels = [(data[f"min_{level}"], data[f"max_{level}"]) for level in range(count)]
+        return cls(levels, block_size, factor, frames, samplerate)
+
+
+class PeakBuilder:
+    def __init__(self, samplerate, channels, block_size=config.PEAKS_BLOCK_SIZE, factor=config.PEAKS_LEVEL_FACTOR):
+        self.samplerate = samplerate
+        self.block_size = block_size
+        self.factor = factor
+        self.frames = 0
+        self._pending = np.zeros((0, channels), dtype='float32')
+        self._mins = []
+        self._maxs = []
+
+    def add(self, data):
+        self.frames += len(data)
+        if len(self._pending):
+            data = np.concatenate([self._pending, data])
+        full = len(data) // self.block_size * self.block_size
+        if full:
+            blocks = data[:full].reshape(-1, self.block_size * data.shape[1])
+            self._mins.append(blocks.min(axis=1).astype('float32'))
+            self._maxs.append(blocks.max(axis=1).astype('float32'))
+        self._pending = data[full:].copy()
+
+    def finish(self):
+        if len(self._pending):
+            self._mins.append(np.array([self._pending.min()], dtype='float32'))
+            self._maxs.append(np.array([self._pending.max()], dtype='float32'))
+            self._pending = self._pending[:0]
+        mins = np.concatenate(self._mins) if self._mins else np.zeros(1, dtype='float32')
+        maxs = np.concatenate(self._maxs) if self._maxs else np.zeros(1, dtype='float32')
+        levels = [(mins, maxs)]
+        while len(mins) > config.PEAKS_MIN_LEVEL_SIZE:
+            pad = -len(mins) % self.factor
+            mins = np.pad(mins, (0, pad), mode='edge').reshape(-1, self.factor).min(axis=1)
+            maxs = np.pad(maxs, (0, pad), mode='edge').reshape(-1, self.factor).max(axis=1)
+            levels.append((mins, maxs))
+        return PeakPyramid(levels, self.block_size, self.factor, self.frames, self.samplerate)
+
+
+_building = {}
+_building_lock = threading.Lock()
+
+def get_peaks_path(file_path):
+    return file_path + config.PEAKS_FILE_SUFFIX
+
+def build_peaks(file_path):
+    # The GUI and the prefetcher can ask for the same file at once; the second caller waits and reuses the result.
+    with _building_lock:
+        lock = _building.setdefault(file_path, threading.Lock())
+    with lock:
+        try:
+            pyramid = read_peaks(file_path)
+            if pyramid is None:
+                with open_reader(file_path) as reader:
+                    builder = PeakBuilder(reader.samplerate, reader.channels)
+                    for start in range(0, reader.frames, config.PEAKS_READ_BLOCK_SIZE):
+                        builder.add(reader.read(start, config.PEAKS_READ_BLOCK_SIZE))
+                pyramid = builder.finish()
+                pyramid.save(get_peaks_path(file_path))
+        finally:
+            with _building_lock:
+                if _building.get(file_path) is lock:
+                    del _building[file_path]
+    return pyramid
+
+def read_peaks(file_path):
+    peaks_path = get_peaks_path(file_path)
+    if os.path.exists(peaks_path) and os.path.getmtime(peaks_path) >= max(os.path.getmtime(path) for path in get_part_paths(file_path)):
+        try:
+            return PeakPyramid.load(peaks_path)
+        except (OSError, ValueError, KeyError):
+            pass
+    return None
+
+def load_peaks(file_path):
+    peaks = read_peaks(file_path)
+    return peaks if peaks is not None else build_peaks(file_path)
@@ -0,0 +1,188 @@
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError, SQLAlchemyError, TimeoutError
+from . import config
+from .library import entry_from_record
+from .metrics import registry
+from .models import RecordingFile, RecordingSegment, Session
+
+DATETIME_FIELDS = ("created_at",)
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, DisconnectionError, TimeoutError)
+
+persistence_failed_writes = registry.counter("persistence_failed_writes_total", "Database writes dropped after a permanent error")
+
+def _encode_fields(fields):
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in fields.items()}
+
+def _decode_fields(fields):
+    return {key: datetime.fromisoformat(value) if key in DATETIME_FIELDS and value else value
+            for key, value in fields.items()}
+
+class PersistenceWorker(threading.Thread):
+    def __init__(self, on_inserted=None, journal_path=config.PERSISTENCE_JOURNAL_PATH,
+                 dead_letter_path=config.PERSISTENCE_DEAD_LETTER_PATH):
+        super().__init__(daemon=True)
+        self.on_inserted = on_inserted
+        self.journal_path = journal_path
+        self.dead_letter_path = dead_letter_path
+        self._queue = queue.Queue()
+        self._outstanding = OrderedDict()
+        self._journal_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._sequence = 0
+        config.ensure_recordings_dir()
+        self._replay_journal()
+
+    def insert(self, **fields):
+        self.submit([{"op": "insert", "fields": fields}])
+
+    def update(self, file_path, **fields):
+        self.submit([{"op": "update", "file_path": file_path, "fields": fields}])
+
+    def insert_segments(self, recording_path, parts):
+        self.submit([{"op": "insert_segment", "recording_path": recording_path, "fields": part} for part in parts])
+
+    def submit(self, operations):
+        with self._journal_lock:
+            journaled = []
+            for operation in operations:
+                self._sequence += 1
+                operation = dict(operation, seq=self._sequence, fields=_encode_fields(operation["fields"]))
+                self._outstanding[operation["seq"]] = operation
+                journaled.append(operation)
+            with open(self.journal_path, "a") as journal:
+                journal.writelines(json.dumps(operation) + "\n" for operation in journaled)
+                journal.flush()
+                os.fsync(journal.fileno())
+        for operation in journaled:
+            self._queue.put(operation)
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path) as journal:
+            for line in journal:
+                try:
+                    operation = json.loads(line)
+                except ValueError:
+                    continue
+                self._outstanding[operation["seq"]] = operation
+                self._sequence = max(self._sequence, operation["seq"])
+                self._queue.put(operation)
+
+    def _compact_journal(self, committed):
+        with self._journal_lock:
+            for operation in committed:
+                self._outstanding.pop(operation["seq"], None)
+            temp_path = self.journal_path + ".tmp"
+            with open(temp_path, "w") as journal:
+                journal.writelines(json.dumps(operation) + "\n" for operation in self._outstanding.values())
+                journal.flush()
+                os.fsync(journal.fileno())
+            os.replace(temp_path, self.journal_path)
+
+    def run(self):
+        delay = config.PERSISTENCE_RETRY_DELAY
+        batch = []
+        while True:
+            if not batch:
+                if self._stop_event.is_set() and self._queue.empty():
+                    break
+                batch = self._next_batch()
+                continue
+            try:
+                inserted, committed = self._apply(batch), batch
+            except TRANSIENT_ERRORS:
+                inserted, committed = [], []
+            except SQLAlchemyError:
+                inserted, committed = self._apply_each(batch)
+            if committed:
+                self._compact_journal(committed)
+            if self.on_inserted:
+                for entry in inserted:
+                    self.on_inserted(entry)
+            if len(committed) < len(batch):
+                batch = batch[len(committed):]
+                if self._stop_event.wait(delay):
+                    break
+                delay = min(delay * 2, config.PERSISTENCE_MAX_RETRY_DELAY)
+                continue
+            delay = config.PERSISTENCE_RETRY_DELAY
+            batch = []
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        while len(batch) < config.PERSISTENCE_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _apply_each(self, batch):
+        inserted = []
+        committed = []
+        for operation in batch:
+            try:
+                inserted.extend(self._apply([operation]))
+            except TRANSIENT_ERRORS:
+                break
+            except SQLAlchemyError as e:
+                self._dead_letter(operation, e)
+            committed.append(operation)
+        return inserted, committed
+
+    def _dead_letter(self, operation, error):
+        persistence_failed_writes.inc()
+        with open(self.dead_letter_path, "a") as dead_letter:
+            dead_letter.write(json.dumps(dict(operation, error=str(error).splitlines()[0])) + "\n")
+
+    def _apply(self, batch):
+        session = Session(expire_on_commit=False)
+        try:
+            paths = [operation["fields"]["file_path"] for operation in batch if operation["op"] == "insert"]
+            existing = set()
+            if paths:
+                existing = {row.file_path for row in session.query(RecordingFile.file_path).filter(RecordingFile.file_path.in_(paths))}
+            inserted = []
+            for operation in batch:
+                fields = _decode_fields(operation["fields"])
+                if operation["op"] == "insert":
+                    if fields["file_path"] in existing:
+                        continue
+                    existing.add(fields["file_path"])
+                    record = RecordingFile(**fields)
+                    session.add(record)
+                    inserted.append(record)
+                elif operation["op"] == "update":
+                    session.query(RecordingFile).filter_by(file_path=operation["file_path"]).update(fields, synchronize_session=False)
+                elif operation["op"] == "insert_segment":
+                    recording_id = session.query(RecordingFile.id).filter_by(file_path=operation["recording_path"]).scalar()
+                    if recording_id is None:
+                        continue
+                    segment = session.query(RecordingSegment).filter_by(file_path=fields["file_path"]).first()
+                    if segment is None:
+                        session.add(RecordingSegment(recording_id=recording_id, **fields))
+                    else:
+                        for key, value in fields.items():
+                            setattr(segment, key, value)
+            session.commit()
+            for record in inserted:
+                session.refresh(record)
+            return [entry_from_record(record) for record in inserted]
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def stop(self, timeout=5):
+        self._stop_event.set()
+        self.join(timeout)
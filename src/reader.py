@@ -0,0 +1,180 @@
+import os
+import struct
+from bisect import bisect_right
+import numpy as np
+import soundfile as sf
+from .utils import get_part_paths
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+SAMPLE_TYPES = {
+    (WAVE_FORMAT_PCM, 8): (np.uint8, 128.0, 128.0),
+    (WAVE_FORMAT_PCM, 16): (np.dtype('<i2'), 0.0, 32768.0),
+    (WAVE_FORMAT_PCM, 32): (np.dtype('<i4'), 0.0, 2147483648.0),
+    (WAVE_FORMAT_IEEE_FLOAT, 32): (np.dtype('<f4'), 0.0, 1.0),
+    (WAVE_FORMAT_IEEE_FLOAT, 64): (np.dtype('<f8'), 0.0, 1.0),
+}
+
+def parse_wav_layout(file_path):
+    with open(file_path, "rb") as file:
+        header = file.read(12)
+        if len(header) < 12 or header[:4] not in (b"RIFF", b"RF64") or header[8:12] != b"WAVE":
+            return None
+        fmt = None
+        data_size64 = None
+        while True:
+            chunk = file.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+            if chunk_id == b"ds64":
+                body = file.read(size + (size & 1))
+                data_size64 = struct.unpack("<Q", body[8:16])[0]
+            elif chunk_id == b"fmt ":
+                body = file.read(size + (size & 1))
+                format_tag, channels, samplerate, _, block_align, bits = struct.unpack("<HHIIHH", body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    format_tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (format_tag, channels, samplerate, block_align, bits)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                offset = file.tell()
+                available = os.fstat(file.fileno()).st_size - offset
+                if size == 0xFFFFFFFF and data_size64 is not None:
+                    size = data_size64
+                if size == 0 or size > available:
+                    size = available
+                format_tag, channels, samplerate, block_align, bits = fmt
+                if (format_tag, bits) not in SAMPLE_TYPES or block_align != channels * bits // 8:
+                    return None
+                return {"offset": offset, "frames": size // block_align, "channels": channels,
+                        "samplerate": samplerate, "sample_type": (format_tag, bits)}
+            else:
+                file.seek(size + (size & 1), os.SEEK_CUR)
+
+class AudioReader:
+    def blocks(self, blocksize, start=0):
+        position = start
+        while position < self.frames:
+            data = self.read(position, blocksize)
+            position += blocksize
+            if len(data) < blocksize:
+                data = np.concatenate([data, np.zeros((blocksize - len(data), self.channels), dtype='float32')])
+            yield data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class MemmapReader(AudioReader):
+    def __init__(self, file_path, layout):
+        self.file_path = file_path
+        self.samplerate = layout["samplerate"]
+        self.channels = layout["channels"]
+        self.frames = layout["frames"]
+        dtype, self._bias, self._scale = SAMPLE_TYPES[layout["sample_type"]]
+        self.samples = np.memmap(file_path, dtype=dtype, mode='r', offset=layout["offset"],
+                                 shape=(self.frames, self.channels))
+
+    def raw(self, start, stop):
+        return self.samples[max(0, start):max(0, stop)]
+
+    def read(self, start, frames):
+        data = self.raw(start, start + frames)
+        if self._scale == 1.0:
+            return data.astype('float32')
+        return ((data.astype('float32') - self._bias) / self._scale).astype('float32', copy=False)
+
+    def close(self):
+        self.samples = None
+
+class SoundFileReader(AudioReader):
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file = sf.SoundFile(file_path)
+        self.samplerate = self.file.samplerate
+        self.channels = self.file.channels
+        self.frames = self.file.frames
+
+    def read(self, start, frames):
+        start = min(max(0, start), self.frames)
+        self.file.seek(start)
+        return self.file.read(max(0, min(frames, self.frames - start)), dtype='float32', always_2d=True)
+
+    def raw(self, start, stop):
+        return self.read(start, stop - start)
+
+    def close(self):
+        self.file.close()
+
+class SegmentedReader(AudioReader):
+    def __init__(self, readers):
+        self.readers = readers
+        self.file_path = readers[0].file_path
+        self.samplerate = readers[0].samplerate
+        self.channels = readers[0].channels
+        self.starts = []
+        self.frames = 0
+        for reader in readers:
+            self.starts.append(self.frames)
+            self.frames += reader.frames
+
+    def read(self, start, frames):
+        position = max(0, start)
+        stop = min(start + frames, self.frames)
+        chunks = []
+        while position < stop:
+            index = bisect_right(self.starts, position) - 1
+            reader = self.readers[index]
+            offset = position - self.starts[index]
+            count = min(stop - position, reader.frames - offset)
+            chunks.append(reader.read(offset, count))
+            position += count
+        if not chunks:
+            return np.zeros((0, self.channels), dtype='float32')
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+    def raw(self, start, stop):
+        return self.read(start, stop - start)
+
+    def close(self):
+        for reader in self.readers:
+            reader.close()
+
+def _open_file(file_path):
+    try:
+        layout = parse_wav_layout(file_path)
+    except (OSError, struct.error):
+        layout = None
+    if layout and layout["frames"] > 0:
+        return MemmapReader(file_path, layout)
+    return SoundFileReader(file_path)
+
+def open_reader(file_path):
+    part_paths = get_part_paths(file_path)
+    if len(part_paths) == 1:
+        return _open_file(file_path)
+    readers = []
+    try:
+        for part_path in part_paths:
+            readers.append(_open_file(part_path))
+    except (OSError, RuntimeError):
+        for reader in readers:
+            reader.close()
+        raise
+    return SegmentedReader(readers)
+
+def describe_parts(file_path):
+    parts = []
+    start_frame = 0
+    for sequence, part_path in enumerate(get_part_paths(file_path), 1):
+        with _open_file(part_path) as reader:
+            frames = reader.frames
+        parts.append({"sequence": sequence, "file_path": part_path, "start_frame": start_frame, "frames": frames,
+                      "size_bytes": os.path.getsize(part_path)})
+        start_frame += frames
+    return parts
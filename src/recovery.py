@@ -0,0 +1,154 @@
+import argparse
+import os
+import struct
+import sys
+import time
+import soundfile as sf
+from . import config, utils
+from .metadata import probe_audio_file
+from .peaks import get_peaks_path
+from .reader import describe_parts
+
+UNKNOWN_FRAMES = 2 ** 63 - 1
+
+def repair_wav_header(file_path, truncate=False):
+    with open(file_path, "r+b") as file:
+        header = file.read(12)
+        if len(header) < 12 or header[:4] not in (b"RIFF", b"RF64") or header[8:12] != b"WAVE":
+            return False
+        file_size = os.fstat(file.fileno()).st_size
+        ds64_offset = None
+        block_align = None
+        while True:
+            chunk = file.read(8)
+            if len(chunk) < 8:
+                return False
+            chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+            if chunk_id == b"data":
+                break
+            if chunk_id == b"ds64":
+                ds64_offset = file.tell()
+            elif chunk_id == b"fmt ":
+                block_align = struct.unpack("<H", file.read(14)[12:14])[0]
+                file.seek(-14, os.SEEK_CUR)
+            file.seek(size + (size & 1), os.SEEK_CUR)
+        data_offset = file.tell()
+        if not block_align or data_offset > file_size:
+            return False
+        data_size = (file_size - data_offset) // block_align * block_align
+        riff_size = data_offset + data_size - 8
+        if header[:4] == b"RF64":
+            if ds64_offset is None:
+                return False
+            file.seek(ds64_offset)
+            declared_riff, declared_data = struct.unpack("<QQ", file.read(16))
+            if declared_riff + 8 >= file_size and declared_data <= file_size - data_offset:
+                return False
+            file.seek(ds64_offset)
+            file.write(struct.pack("<QQQ", riff_size, data_size, data_size // block_align))
+        else:
+            declared_riff = struct.unpack("<I", header[4:8])[0]
+            declared_data = size
+            if declared_riff + 8 >= file_size and declared_data <= file_size - data_offset:
+                return False
+            if riff_size > 0xFFFFFFFF:
+                return False
+            file.seek(4)
+            file.write(struct.pack("<I", riff_size))
+            file.seek(data_offset - 4)
+            file.write(struct.pack("<I", data_size))
+        if truncate and data_offset + data_size < file_size:
+            file.truncate(data_offset + data_size)
+    return True
+
+def salvage_compressed_file(file_path):
+    with sf.SoundFile(file_path) as source:
+        if source.format in ("WAV", "RF64") or source.frames != UNKNOWN_FRAMES:
+            return False
+        temp_path = file_path + ".tmp"
+        with sf.SoundFile(temp_path, mode='w', samplerate=source.samplerate, channels=source.channels,
+                          subtype=source.subtype, format=source.format) as destination:
+            while True:
+                try:
+                    block = source.read(config.RECOVERY_READ_BLOCK_SIZE, dtype='float32', always_2d=True)
+                except RuntimeError:
+                    break
+                if not len(block):
+                    break
+                destination.write(block)
+    os.replace(temp_path, file_path)
+    return True
+
+def repair_file(file_path):
+    return repair_wav_header(file_path, truncate=True) or salvage_compressed_file(file_path)
+
+def find_interrupted(directory=config.RECORDED_FILES_PATH):
+    suffix = config.RECORDING_MARKER_SUFFIX
+    with os.scandir(directory) as entries:
+        return sorted(entry.path[:-len(suffix)] for entry in entries if entry.name.endswith(suffix))
+
+def recover_recordings(directory=config.RECORDED_FILES_PATH, min_age=config.RECOVERY_MIN_AGE_SECONDS, scan_all=False):
+    if not os.path.isdir(directory):
+        return {}
+    if scan_all:
+        with os.scandir(directory) as entries:
+            file_paths = sorted(entry.path for entry in entries if utils.is_audio_file_name(entry.name) and entry.is_file())
+    else:
+        file_paths = find_interrupted(directory)
+    recovered = {}
+    now = time.time()
+    for file_path in file_paths:
+        marker_path = utils.get_marker_path(file_path)
+        try:
+            interrupted = os.path.exists(marker_path)
+            if not os.path.exists(file_path):
+                if interrupted:
+                    os.remove(marker_path)
+                continue
+            part_paths = utils.get_part_paths(file_path)
+            if now - max(os.path.getmtime(path) for path in part_paths) < min_age:
+                continue
+            repaired = [path for path in part_paths if repair_file(path)]
+            if not repaired and not interrupted:
+                continue
+            peaks_path = get_peaks_path(file_path)
+            if os.path.exists(peaks_path):
+                os.remove(peaks_path)
+            recovered[file_path] = (probe_audio_file(file_path), describe_parts(file_path))
+        except OSError:
+            continue
+        except (RuntimeError, ValueError, struct.error) as error:
+            print(f"Could not recover {file_path}: {error}", file=sys.stderr)
+            try:
+                os.remove(marker_path)
+            except OSError:
+                pass
+    return recovered
+
+def submit_recovered(persistence, recovered):
+    for file_path, (info, parts) in recovered.items():
+        persistence.update(file_path, **info)
+        if len(parts) > 1:
+            persistence.insert_segments(file_path, parts)
+        marker_path = utils.get_marker_path(file_path)
+        if os.path.exists(marker_path):
+            os.remove(marker_path)
+
+if __name__ == "__main__":
+    from .persistence import PersistenceWorker
+    parser = argparse.ArgumentParser(description="Repair recordings left behind by a crash and update the database.")
+    parser.add_argument("--directory", default=config.RECORDED_FILES_PATH, help="recordings directory to check")
+    parser.add_argument("--min-age", type=float, default=config.RECOVERY_MIN_AGE_SECONDS,
+                        help="skip files modified within this many seconds (they may still be recording)")
+    parser.add_argument("--all", action="store_true",
+                        help="check every recording, not only those left open by a crash (for files from older versions)")
+    args = parser.parse_args()
+    recovered = recover_recordings(args.directory, args.min_age, args.all)
+    for file_path, (info, parts) in recovered.items():
+        print(f"Recovered {file_path}: {info['duration']:.1f}s in {len(parts)} part(s)")
+    if recovered:
+        persistence = PersistenceWorker()
+        persistence.start()
+        submit_recovered(persistence, recovered)
+        persistence.stop(timeout=None)
+    print(f"Recovered {len(recovered)} recordings")
@@ -0,0 +1,62 @@
+import math
+import numpy as np
+from . import config
+
+def remix(data, channels):
+    if data.shape[1] == channels:
+        return data
+    if channels == 1:
+        return data.mean(axis=1, keepdims=True, dtype='float32')
+    if channels < data.shape[1]:
+        return data[:, :channels]
+    return data[:, np.arange(channels) % data.shape[1]]
+
+# Windowed-sinc polyphase resampler: output sample j sits at input position j * down / up, and the
+# weights for each of the `up` fractional positions are computed once, so a block costs one gather
+# and one multiply-add per tap.
+class Resampler:
+    def __init__(self, source_rate, target_rate, channels, half_taps=config.RESAMPLE_HALF_TAPS,
+                 chunk_frames=config.RESAMPLE_CHUNK_FRAMES):
+        divisor = math.gcd(source_rate, target_rate)
+        self.up = target_rate // divisor
+        self.down = source_rate // divisor
+        self.half_taps = half_taps
+        self.chunk_frames = chunk_frames
+        self.offsets = np.arange(1 - half_taps, half_taps + 1)
+        cutoff = min(1.0, self.up / self.down)
+        distance = (np.arange(self.up) / self.up)[:, None] - self.offsets[None, :]
+        window = 0.5 + 0.5 * np.cos(np.pi * np.clip(distance / half_taps, -1, 1))
+        self.weights = (cutoff * np.sinc(cutoff * distance) * window).astype('float32')
+        self.received = 0
+        self.produced = 0
+        self._buffer = np.zeros((half_taps, channels), dtype='float32')
+        self._buffer_start = -half_taps
+
+    def process(self, data):
+        self._buffer = np.concatenate([self._buffer, data])
+        self.received += len(data)
+        end = self._buffer_start + len(self._buffer)
+        return self._produce(min(-(-(end - self.half_taps) * self.up // self.down), self._total()))
+
+    def flush(self):
+        self._buffer = np.concatenate([self._buffer, np.zeros((self.half_taps, self._buffer.shape[1]), dtype='float32')])
+        return self._produce(self._total())
+
+    def _total(self):
+        return -(-self.received * self.up // self.down)
+
+    def _produce(self, count):
+        chunks = []
+        for first in range(self.produced, count, self.chunk_frames):
+            positions = np.arange(first, min(first + self.chunk_frames, count), dtype=np.int64) * self.down
+            base, phase = np.divmod(positions, self.up)
+            taps = self._buffer[base[:, None] + self.offsets - self._buffer_start]
+            chunks.append(np.einsum('ik,ikc->ic', self.weights[phase], taps))
+        self.produced = max(self.produced, count)
+        consumed = self.produced * self.down // self.up + 1 - self.half_taps - self._buffer_start
+        if consumed > 0:
+            self._buffer = self._buffer[consumed:]
+            self._buffer_start += consumed
+        if not chunks:
+            return np.zeros((0, self._buffer.shape[1]), dtype='float32')
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
@@ -0,0 +1,106 @@
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+from . import config, utils
+from .library import RecordingEntry
+
+ScanResult = namedtuple("ScanResult", ["inserted", "missing", "restored"])
+
+def _batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class ReconciliationScanner:
+    def __init__(self, submit, directory=config.RECORDED_FILES_PATH, cache_path=config.SCAN_CACHE_PATH):
+        self.submit = submit
+        self.directory = directory
+        self.cache_path = cache_path
+        self.directory_mtime = None
+        self.files = {}
+        self._load_cache()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path) as cache:
+                data = json.load(cache)
+        except (OSError, ValueError):
+            return
+        self.directory_mtime = data.get("directory_mtime")
+        self.files = {name: tuple(stat) for name, stat in data.get("files", {}).items()}
+
+    def _save_cache(self):
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w") as cache:
+            json.dump({"directory_mtime": self.directory_mtime, "files": self.files}, cache)
+        os.replace(temp_path, self.cache_path)
+
+    def scan_directory(self, force=False):
+        try:
+            directory_mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            directory_mtime, files = None, {}
+        else:
+            if not force and directory_mtime == self.directory_mtime:
+                return None
+            files = {}
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if utils.is_audio_file_name(entry.name) and entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        added = files.keys() - self.files.keys()
+        removed = self.files.keys() - files.keys()
+        changed = {name for name in files.keys() & self.files.keys() if files[name] != self.files[name]}
+        self.files = files
+        self.directory_mtime = directory_mtime
+        if directory_mtime is not None:
+            self._save_cache()
+        return added, removed, changed
+
+    def reconcile(self, session, full=False):
+        from .models import RecordingFile
+        changes = self.scan_directory(force=full)
+        if changes is None and not full:
+            return ScanResult([], [], [])
+        added, removed, changed = changes if changes else (set(), set(), set())
+        columns = (RecordingFile.id, RecordingFile.file_name, RecordingFile.file_path, RecordingFile.duration, RecordingFile.missing)
+        rows = {}
+        if full:
+            for row in session.query(*columns).yield_per(config.SCAN_BATCH_SIZE):
+                rows[row.file_path] = row
+            candidates = {os.path.join(self.directory, name) for name in self.files} | set(rows)
+        else:
+            paths = [os.path.join(self.directory, name) for name in added | removed | changed]
+            for batch in _batched(paths, config.SCAN_BATCH_SIZE):
+                for row in session.query(*columns).filter(RecordingFile.file_path.in_(batch)):
+                    rows[row.file_path] = row
+            candidates = set(paths)
+
+        operations, inserted, missing, restored = [], [], [], []
+        for file_path in candidates:
+            name = os.path.basename(file_path)
+            row = rows.get(file_path)
+            if os.path.dirname(file_path) == self.directory:
+                on_disk = name in self.files
+            else:
+                on_disk = os.path.exists(file_path)
+            if on_disk and row is None:
+                operations.append({"op": "insert", "fields": {"file_name": name, "file_path": file_path,
+                                                              "created_at": self._created_at(name), "missing": False,
+                                                              "size_bytes": self.files[name][1]}})
+                inserted.append(file_path)
+            elif on_disk and row.missing:
+                operations.append({"op": "update", "file_path": file_path, "fields": {"missing": False}})
+                restored.append(RecordingEntry(row.id, row.file_name, row.file_path, row.duration))
+            elif on_disk and name in changed:
+                operations.append({"op": "update", "file_path": file_path, "fields": {"size_bytes": self.files[name][1]}})
+            elif not on_disk and row is not None and not row.missing:
+                operations.append({"op": "update", "file_path": file_path, "fields": {"missing": True}})
+                missing.append(file_path)
+        for batch in _batched(operations, config.SCAN_BATCH_SIZE):
+            self.submit(batch)
+        return ScanResult(inserted, missing, restored)
+
+    def _created_at(self, name):
+        return datetime.fromtimestamp(self.files[name][0] / 1e9)
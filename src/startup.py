@@ -0,0 +1,29 @@
+import sys
+import threading
+import time
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.started_at = time.perf_counter()
+        self.phases = []
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def mark(self, phase):
+        with self._lock:
+            self.phases.append((time.perf_counter() - self.started_at, threading.current_thread().name, phase))
+
+    def report(self, stream=sys.stderr):
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        with self._lock:
+            phases = sorted(self.phases)
+        print("Startup timing (ms since launch):", file=stream)
+        previous = 0.0
+        for elapsed, thread_name, phase in phases:
+            print(f"  {elapsed * 1000:9.1f}  (+{(elapsed - previous) * 1000:7.1f})  [{thread_name}] {phase}", file=stream)
+            previous = elapsed
+
+profiler = StartupProfiler()
@@ -1,21 +1,45 @@
 from datetime import datetime
 import os
+import re
 from . import config
 
-def create_new_audio_file_name():
-    return "Recording_" + datetime.now().strftime("%Y-%m-%d-%I-%M-%S_") + ".wav"
+def create_new_audio_file_name(profile_name=config.DEFAULT_RECORDING_PROFILE):
+    extension = config.AUDIO_FILE_EXTENSIONS[config.RECORDING_PROFILES[profile_name]["format"]]
+    return "Recording_" + datetime.now().strftime("%Y-%m-%d-%H-%M-%S_") + extension
+
+PART_NAME_PATTERN = re.compile(re.escape(config.RECORDING_PART_SUFFIX) + r"\d{3,}\.\w+$")
+
+def is_audio_file_name(filename):
+    return (filename.startswith("Recording_") and filename.endswith(tuple(config.AUDIO_FILE_EXTENSIONS.values()))
+            and not PART_NAME_PATTERN.search(filename))
 
 def get_audio_file_path(filename):
+    config.ensure_recordings_dir()
     return os.path.join(config.RECORDED_FILES_PATH, filename)
 
+def get_part_path(file_path, number):
+    root, extension = os.path.splitext(file_path)
+    return f"{root}{config.RECORDING_PART_SUFFIX}{number:03d}{extension}"
+
+def get_part_paths(file_path):
+    paths = [file_path]
+    while os.path.exists(get_part_path(file_path, len(paths) + 1)):
+        paths.append(get_part_path(file_path, len(paths) + 1))
+    return paths
+
+def get_marker_path(file_path):
+    return file_path + config.RECORDING_MARKER_SUFFIX
+
 def file_datetime(filename):
     timestamp_str = filename.split("_")[1]
-    timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d-%I-%M-%S")
+    timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d-%H-%M-%S")
     return timestamp
 
 def get_last_audio_file_name():
-    list_of_files = os.listdir(config.RECORDED_FILES_PATH)
-    list_of_audio_files = [filename for filename in list_of_files if filename.startswith("Recording_") and filename.endswith(".wav")]
-    for filename in sorted(list_of_audio_files, key=file_datetime, reverse=True):
-        return os.path.join(config.RECORDED_FILES_PATH, filename)
-    return None
\ No newline at end of file
+    if not os.path.isdir(config.RECORDED_FILES_PATH):
+        return None
+    with os.scandir(config.RECORDED_FILES_PATH) as entries:
+        audio_files = [entry for entry in entries if is_audio_file_name(entry.name) and entry.is_file()]
+    if not audio_files:
+        return None
+    return max(audio_files, key=lambda entry: entry.stat().st_mtime_ns).path
@@ -0,0 +1,63 @@
+from collections import deque
+import numpy as np
+from . import config
+
+VAD_MODES = ("trim", "split")
+
+class VoiceActivityGate:
+    def __init__(self, samplerate, channels, frame_seconds=config.VAD_FRAME_SECONDS, start_db=config.VAD_START_DB,
+                 stop_db=config.VAD_STOP_DB, hangover_seconds=config.VAD_HANGOVER_SECONDS,
+                 preroll_seconds=config.VAD_PREROLL_SECONDS):
+        self.frame_size = max(1, int(samplerate * frame_seconds))
+        self.start_level = 10 ** (start_db / 20)
+        self.stop_level = 10 ** (stop_db / 20)
+        self.hangover_frames = max(1, round(hangover_seconds / frame_seconds))
+        self.is_active = False
+        self.position = 0
+        self._silent_frames = 0
+        self._preroll = deque(maxlen=max(0, round(preroll_seconds / frame_seconds)))
+        self._pending = np.zeros((0, channels), dtype='float32')
+
+    def process(self, data):
+        if len(self._pending):
+            data = np.concatenate([self._pending, data])
+        full = len(data) // self.frame_size * self.frame_size
+        self._pending = data[full:].copy()
+        frames = data[:full].reshape(-1, self.frame_size, data.shape[1])
+        energy = np.sqrt(np.square(frames).mean(axis=(1, 2)))
+        events = []
+        audio = []
+        for frame, level in zip(frames, energy):
+            if not self.is_active:
+                if level >= self.start_level:
+                    self.is_active = True
+                    self._silent_frames = 0
+                    events.append(("start", self.position - len(self._preroll) * self.frame_size))
+                    audio.extend(self._preroll)
+                    self._preroll.clear()
+                    audio.append(frame)
+                elif self._preroll.maxlen:
+                    self._preroll.append(frame.copy())
+            else:
+                audio.append(frame)
+                self._silent_frames = self._silent_frames + 1 if level < self.stop_level else 0
+                if self._silent_frames >= self.hangover_frames:
+                    self.is_active = False
+                    events.append(("audio", np.concatenate(audio)))
+                    events.append(("stop", self.position + self.frame_size))
+                    audio = []
+            self.position += self.frame_size
+        if audio:
+            events.append(("audio", np.concatenate(audio)))
+        return events
+
+    def flush(self):
+        events = []
+        if self.is_active:
+            if len(self._pending):
+                events.append(("audio", self._pending))
+            self.position += len(self._pending)
+            events.append(("stop", self.position))
+            self.is_active = False
+        self._pending = self._pending[:0]
+        return events
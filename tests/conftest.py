@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+import pytest
+
+_root = tempfile.mkdtemp(prefix="voice-recorder-tests-")
+os.environ["VOICE_RECORDER_RECORDINGS_PATH"] = os.path.join(_root, "recordings")
+os.environ["VOICE_RECORDER_DATABASE_URL"] = "sqlite:///" + os.path.join(_root, "test.sqlite")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def session():
+    from src.models import Base, Session, get_engine
+    Base.metadata.create_all(get_engine())
+    session = Session()
+    yield session
+    session.close()
+    Base.metadata.drop_all(get_engine())
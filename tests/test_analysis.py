@@ -0,0 +1,75 @@
+import os
+import socket
+import subprocess
+import sys
+from datetime import datetime, timedelta
+import pytest
+from src import analysis
+from src.models import AnalysisJob, RecordingFile
+
+@pytest.fixture
+def recordings(session):
+    for number in range(4):
+        session.add(RecordingFile(file_name=f"{number}.wav", file_path=f"/r/{number}.wav", duration=1.0))
+    session.add(RecordingFile(file_name="missing.wav", file_path="/r/missing.wav", duration=1.0, missing=True))
+    session.add(RecordingFile(file_name="unprobed.wav", file_path="/r/unprobed.wav"))
+    session.commit()
+    return session
+
+def statuses(session):
+    return [status for status, in session.query(AnalysisJob.status).order_by(AnalysisJob.id)]
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def test_enqueues_each_playable_recording_once(recordings):
+    assert analysis.enqueue_missing(recordings) == 4
+    assert analysis.enqueue_missing(recordings) == 0
+    assert statuses(recordings) == ["pending"] * 4
+
+def test_claims_are_exclusive(recordings):
+    from src.models import Session
+    analysis.enqueue_missing(recordings)
+    first = analysis.claim_jobs(recordings, 3)
+    other = Session()
+    try:
+        second = analysis.claim_jobs(other, 3)
+    finally:
+        other.close()
+    assert [job[2] for job in first] == ["/r/0.wav", "/r/1.wav", "/r/2.wav"]
+    assert [job[2] for job in second] == ["/r/3.wav"]
+    assert analysis.claim_jobs(recordings, 3) == []
+    job = recordings.get(AnalysisJob, first[0][0])
+    assert (job.owner_host, job.owner_pid) == (socket.gethostname(), os.getpid())
+
+def test_releases_only_stale_claims(recordings):
+    analysis.enqueue_missing(recordings)
+    claimed = analysis.claim_jobs(recordings, 2)
+    recordings.query(AnalysisJob).filter_by(id=claimed[0][0]).update(
+        {"updated_at": datetime.now() - timedelta(seconds=600)})
+    recordings.commit()
+    analysis.release_stale_jobs(recordings, max_age=300)
+    assert statuses(recordings) == ["pending", "running", "pending", "pending"]
+
+def test_releases_claims_of_dead_processes_on_this_host(recordings):
+    analysis.enqueue_missing(recordings)
+    analysis.claim_jobs(recordings, 4)
+    pid = dead_pid()
+    owners = [(socket.gethostname(), pid), ("elsewhere", pid), (socket.gethostname(), os.getppid()),
+              (socket.gethostname(), os.getpid())]
+    for job, (host, owner_pid) in zip(recordings.query(AnalysisJob).order_by(AnalysisJob.id), owners):
+        job.owner_host, job.owner_pid = host, owner_pid
+    recordings.commit()
+    analysis.release_dead_claims(recordings)
+    assert statuses(recordings) == ["pending", "running", "running", "running"]
+
+def test_service_releases_only_its_own_claims(recordings):
+    analysis.enqueue_missing(recordings)
+    service = analysis.AnalysisService()
+    service._claimed.update(job[0] for job in analysis.claim_jobs(recordings, 2))
+    analysis.claim_jobs(recordings, 1)
+    service._release(recordings, service._claimed)
+    assert statuses(recordings) == ["pending", "pending", "running", "pending"]
+    assert not service._claimed
@@ -0,0 +1,36 @@
+import numpy as np
+from src.buffers import RingBuffer
+
+def read_all(buffer):
+    segments = buffer.peek()
+    data = np.concatenate(segments) if segments else np.zeros((0, buffer.channels), dtype='float32')
+    buffer.advance(len(data))
+    return data
+
+def test_wraps_around_and_keeps_order():
+    buffer = RingBuffer(8, 2)
+    for start in range(0, 60, 5):
+        block = np.arange(start * 2, (start + 5) * 2, dtype='float32').reshape(5, 2)
+        assert buffer.write(block) == 5
+        np.testing.assert_array_equal(read_all(buffer), block)
+    assert buffer.available == 0
+    assert buffer.overflows == 0
+
+def test_peek_splits_at_the_end_of_storage():
+    buffer = RingBuffer(4, 1)
+    buffer.write(np.zeros((3, 1), dtype='float32'))
+    buffer.advance(3)
+    buffer.write(np.array([[1], [2], [3]], dtype='float32'))
+    segments = buffer.peek()
+    assert [len(segment) for segment in segments] == [1, 2]
+    np.testing.assert_array_equal(np.concatenate(segments)[:, 0], [1, 2, 3])
+    assert len(np.concatenate(buffer.peek(2))) == 2
+
+def test_overflow_drops_the_excess():
+    buffer = RingBuffer(4, 1)
+    assert buffer.write(np.arange(6, dtype='float32').reshape(6, 1)) == 4
+    assert buffer.overflows == 1
+    assert buffer.dropped_frames == 2
+    assert buffer.write(np.ones((1, 1), dtype='float32')) == 0
+    assert buffer.dropped_frames == 3
+    np.testing.assert_array_equal(read_all(buffer)[:, 0], [0, 1, 2, 3])
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from src import config
+from src.analysis import LoudnessMeter, integrated_loudness
+from src.levels import LevelMonitor
+
+def test_level_monitor_reports_peak_rms_and_columns():
+    monitor = LevelMonitor(1000, 1, 0.01)
+    data = np.tile(np.array([0.5, -0.5], dtype='float32'), 8)[:, None]
+    levels = monitor.add(data)
+    assert levels.elapsed == pytest.approx(0.016)
+    assert levels.peak[0] == pytest.approx(0.5)
+    assert levels.rms[0] == pytest.approx(0.5)
+    assert len(levels.mins) == 1
+    levels = monitor.add(data[:4])
+    assert len(levels.mins) == 1
+    assert levels.mins[0] == pytest.approx(-0.5) and levels.maxs[0] == pytest.approx(0.5)
+
+def measure(data, samplerate, block=4800):
+    meter = LoudnessMeter(samplerate, data.shape[1], block_size=block)
+    for start in range(0, len(data), block):
+        meter.add(data[start:start + block])
+    return meter.result()
+
+def test_sine_reference_loudness():
+    samplerate = 48000
+    data = (0.1 * np.sin(2 * np.pi * 997 * np.arange(samplerate * 5) / samplerate))[:, None]
+    result = measure(data, samplerate)
+    assert result["loudness"] == pytest.approx(-23.0, abs=0.2)
+    assert result["peak_level"] == pytest.approx(0.1, abs=1e-3)
+    assert result["clipped_samples"] == 0
+    assert result["silence_ratio"] == 0.0
+
+def test_block_size_does_not_change_loudness():
+    samplerate = 44100
+    data = np.random.default_rng(1).uniform(-0.3, 0.3, (samplerate * 3, 2))
+    assert measure(data, samplerate, 1000)["loudness"] == pytest.approx(measure(data, samplerate, 65536)["loudness"], abs=1e-6)
+
+def test_counts_clipping_and_silence():
+    samplerate = 8000
+    data = np.zeros((samplerate * 2, 1))
+    data[:samplerate] = config.LEVEL_CLIP_THRESHOLD
+    result = measure(data, samplerate)
+    assert result["clipped_samples"] == samplerate
+    assert result["silence_ratio"] == pytest.approx(0.5, abs=0.05)
+
+def test_silence_has_no_loudness():
+    assert measure(np.zeros((16000, 1)), 8000)["loudness"] is None
+    assert integrated_loudness(np.zeros(0)) is None
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+import pytest
+from src.library import LibraryQuery
+from src.models import RecordingAnalysis, RecordingFile
+
+@pytest.fixture
+def recordings(session):
+    start = datetime(2026, 1, 1)
+    for number in range(23):
+        record = RecordingFile(file_name=f"Recording_{number:02d}.wav", file_path=f"/r/{number:02d}.wav",
+                               created_at=start + timedelta(hours=number // 3), duration=float(number % 4) or None)
+        session.add(record)
+        session.flush()
+        if number % 5:
+            session.add(RecordingAnalysis(recording_id=record.id, loudness=-20.0 - number % 3))
+    session.add(RecordingFile(file_name="Recording_gone.wav", file_path="/r/gone.wav", created_at=start, missing=True))
+    session.commit()
+    return session
+
+def walk(session, query, limit):
+    rows, cursor = [], None
+    while True:
+        page = query.page(session, cursor=cursor, limit=limit)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        cursor = LibraryQuery.cursor(page[-1])
+
+@pytest.mark.parametrize("sort", ["created_at", "duration", "loudness"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_keyset_pages_cover_every_row_once(recordings, sort, descending):
+    query = LibraryQuery(sort=sort, descending=descending)
+    expected = [row.id for row in query.page(recordings, limit=1000)]
+    assert len(expected) == query.count(recordings) == 23
+    for limit in (1, 4, 7, 23):
+        assert [row.id for row in walk(recordings, query, limit)] == expected
+
+def test_ties_are_broken_by_id(recordings):
+    rows = LibraryQuery(sort="created_at", descending=False).page(recordings, limit=6)
+    assert [(row.created_at, row.id) for row in rows] == sorted((row.created_at, row.id) for row in rows)
+    assert rows[0].created_at == rows[2].created_at
+
+def test_offset_skips_within_a_page(recordings):
+    query = LibraryQuery()
+    first = query.page(recordings, limit=5)
+    assert query.page(recordings, offset=2, limit=3) == first[2:]
+
+def test_name_filter_treats_wildcards_literally(recordings):
+    assert LibraryQuery(name="_0").count(recordings) == 10
+    assert LibraryQuery(name="%").count(recordings) == 0
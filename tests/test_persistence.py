@@ -0,0 +1,71 @@
+import json
+from datetime import datetime
+import pytest
+from src.models import RecordingFile
+from src.persistence import PersistenceWorker
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "journal.jsonl"), str(tmp_path / "failed.jsonl")
+
+def write_journal(path, operations):
+    with open(path, "w") as journal:
+        journal.writelines(json.dumps(operation) + "\n" for operation in operations)
+
+def run_worker(journal_path, dead_letter_path, on_inserted=None):
+    worker = PersistenceWorker(on_inserted=on_inserted, journal_path=journal_path, dead_letter_path=dead_letter_path)
+    worker.start()
+    worker.stop(timeout=None)
+    return worker
+
+def test_replays_journal_left_by_a_previous_run(session, paths):
+    journal_path, dead_letter_path = paths
+    created_at = datetime(2026, 1, 2, 15, 30)
+    write_journal(journal_path, [
+        {"op": "insert", "seq": 1, "fields": {"file_name": "a.wav", "file_path": "/r/a.wav", "created_at": created_at.isoformat()}},
+        {"op": "update", "seq": 2, "file_path": "/r/a.wav", "fields": {"duration": 2.5}},
+    ])
+    inserted = []
+    run_worker(journal_path, dead_letter_path, inserted.append)
+    record = session.query(RecordingFile).one()
+    assert (record.file_path, record.created_at, record.duration) == ("/r/a.wav", created_at, 2.5)
+    assert [entry.file_path for entry in inserted] == ["/r/a.wav"]
+    with open(journal_path) as journal:
+        assert journal.read() == ""
+
+def test_unfinished_writes_survive_a_restart(session, paths):
+    journal_path, dead_letter_path = paths
+    worker = PersistenceWorker(journal_path=journal_path, dead_letter_path=dead_letter_path)
+    worker.insert(file_name="b.wav", file_path="/r/b.wav")
+    with open(journal_path) as journal:
+        assert [json.loads(line)["seq"] for line in journal] == [1]
+    restarted = run_worker(journal_path, dead_letter_path)
+    assert session.query(RecordingFile.file_path).scalar() == "/r/b.wav"
+    restarted.insert(file_name="c.wav", file_path="/r/c.wav")
+    with open(journal_path) as journal:
+        assert [json.loads(line)["seq"] for line in journal] == [2]
+
+def test_replay_skips_torn_lines_and_duplicate_inserts(session, paths):
+    journal_path, dead_letter_path = paths
+    write_journal(journal_path, [
+        {"op": "insert", "seq": 1, "fields": {"file_name": "d.wav", "file_path": "/r/d.wav"}},
+        {"op": "insert", "seq": 2, "fields": {"file_name": "d.wav", "file_path": "/r/d.wav"}},
+    ])
+    with open(journal_path, "a") as journal:
+        journal.write('{"op": "upd')
+    run_worker(journal_path, dead_letter_path)
+    assert session.query(RecordingFile).count() == 1
+
+def test_permanent_errors_go_to_the_dead_letter_file(session, paths):
+    journal_path, dead_letter_path = paths
+    write_journal(journal_path, [
+        {"op": "insert", "seq": 1, "fields": {"file_name": "e.wav", "file_path": "/r/e.wav"}},
+        {"op": "insert", "seq": 2, "fields": {"file_name": "e.wav", "file_path": "/elsewhere/e.wav"}},
+        {"op": "insert", "seq": 3, "fields": {"file_name": "f.wav", "file_path": "/r/f.wav"}},
+    ])
+    run_worker(journal_path, dead_letter_path)
+    assert sorted(path for path, in session.query(RecordingFile.file_path)) == ["/r/e.wav", "/r/f.wav"]
+    with open(dead_letter_path) as dead_letter:
+        assert [json.loads(line)["seq"] for line in dead_letter] == [2]
+    with open(journal_path) as journal:
+        assert journal.read() == ""
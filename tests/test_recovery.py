@@ -0,0 +1,61 @@
+import os
+import struct
+import numpy as np
+import soundfile as sf
+from src.recovery import repair_wav_header
+
+def write_wav(path, frames=1000, format="WAV"):
+    sf.write(path, np.zeros((frames, 2), dtype='float32'), 8000, subtype="PCM_16", format=format)
+    with open(path, "rb") as file:
+        content = file.read()
+    return content.index(b"data") + 8
+
+def header_sizes(path, data_offset):
+    with open(path, "rb") as file:
+        content = file.read(data_offset)
+    return struct.unpack("<I", content[4:8])[0], struct.unpack("<I", content[data_offset - 4:data_offset])[0]
+
+def test_leaves_a_complete_file_alone(tmp_path):
+    path = str(tmp_path / "complete.wav")
+    write_wav(path)
+    assert not repair_wav_header(path)
+
+def test_rewrites_sizes_left_at_zero(tmp_path):
+    path = str(tmp_path / "crashed.wav")
+    data_offset = write_wav(path)
+    with open(path, "r+b") as file:
+        file.seek(4)
+        file.write(struct.pack("<I", 0))
+        file.seek(data_offset - 4)
+        file.write(struct.pack("<I", 0))
+    assert repair_wav_header(path)
+    assert header_sizes(path, data_offset) == (data_offset + 4000 - 8, 4000)
+    assert sf.info(path).frames == 1000
+
+def test_truncate_drops_a_partial_frame(tmp_path):
+    path = str(tmp_path / "partial.wav")
+    data_offset = write_wav(path)
+    with open(path, "ab") as file:
+        file.write(b"\x01\x02\x03")
+    assert repair_wav_header(path, truncate=True)
+    assert os.path.getsize(path) == data_offset + 4000
+    assert header_sizes(path, data_offset) == (data_offset + 4000 - 8, 4000)
+
+def test_rewrites_rf64_sizes(tmp_path):
+    path = str(tmp_path / "crashed_rf64.wav")
+    data_offset = write_wav(path, format="RF64")
+    with open(path, "rb") as file:
+        content = file.read(data_offset)
+    ds64_offset = content.index(b"ds64") + 8
+    with open(path, "r+b") as file:
+        file.seek(ds64_offset)
+        file.write(struct.pack("<QQQ", 0, 0, 0))
+    assert repair_wav_header(path)
+    with open(path, "rb") as file:
+        file.seek(ds64_offset)
+        assert struct.unpack("<QQQ", file.read(24)) == (data_offset + 4000 - 8, 4000, 1000)
+
+def test_ignores_other_formats(tmp_path):
+    path = str(tmp_path / "recording.flac")
+    sf.write(path, np.zeros((1000, 1), dtype='float32'), 8000)
+    assert not repair_wav_header(path)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from src.resample import Resampler, remix
+
+def sine(frequency, samplerate, frames, channels=1):
+    wave = np.sin(2 * np.pi * frequency * np.arange(frames) / samplerate).astype('float32')
+    return np.repeat(wave[:, None], channels, axis=1)
+
+def resample(source_rate, target_rate, data, block):
+    resampler = Resampler(source_rate, target_rate, data.shape[1])
+    chunks = [resampler.process(data[start:start + block]) for start in range(0, len(data), block)]
+    return np.concatenate(chunks + [resampler.flush()])
+
+def test_remix_downmix_to_mono_averages():
+    data = np.array([[1.0, 0.0], [0.5, -0.5]], dtype='float32')
+    np.testing.assert_allclose(remix(data, 1), [[0.5], [0.0]])
+
+def test_remix_upmix_cycles_source_channels():
+    data = np.array([[1.0, 2.0]], dtype='float32')
+    np.testing.assert_array_equal(remix(data, 4), [[1.0, 2.0, 1.0, 2.0]])
+    np.testing.assert_array_equal(remix(data[:, :1], 2), [[1.0, 1.0]])
+
+def test_remix_keeps_leading_channels_when_reducing():
+    data = np.array([[1.0, 2.0, 3.0]], dtype='float32')
+    np.testing.assert_array_equal(remix(data, 2), [[1.0, 2.0]])
+
+@pytest.mark.parametrize("source_rate, target_rate", [(48000, 16000), (44100, 48000), (16000, 44100)])
+def test_output_length_matches_rate_ratio(source_rate, target_rate):
+    data = sine(440, source_rate, 12345)
+    output = resample(source_rate, target_rate, data, 1000)
+    assert len(output) == -(-len(data) * target_rate // source_rate)
+
+def test_block_size_does_not_change_the_result():
+    data = sine(1000, 44100, 20000, channels=2)
+    np.testing.assert_allclose(resample(44100, 48000, data, 20000), resample(44100, 48000, data, 777), atol=1e-6)
+
+def test_keeps_an_in_band_tone():
+    output = resample(48000, 16000, sine(1000, 48000, 48000), 4096)
+    np.testing.assert_allclose(output[1000:-1000, 0], sine(1000, 16000, len(output))[1000:-1000, 0], atol=0.01)
+
+def test_removes_a_tone_above_the_new_nyquist():
+    output = resample(48000, 16000, sine(12000, 48000, 48000), 4096)
+    assert np.abs(output[1000:-1000]).max() < 0.05